@@ -29,20 +29,25 @@ import csv
 from PIL import Image, UnidentifiedImageError
 import win32com.client
 import threading
+import queue
 import random
 
 import get_icons as gi
 import custom_ctk_toplevels as tl
 import APY_launcher_updates as up
 import game_detector as gd
+import store_detectors as sd
 
 
 # global variables
 _log = True  # write errors to log file, should be set to True when converting to .exe
 _debug = False  # print errors, should be set to False when converting to .exe
 _version = "2.1.0"
-_language_separators_indexes = [0, 7, 18, 72, 104, 121, 150, 167]
+_language_separators_indexes = [0, 7, 18, 72, 106, 123, 152, 169]
 installing = False  # set to True when the launcher is updating itself and should not be closed
+_ui_events = queue.Queue()  # (function, args) posted by the background threads, called on the Tk thread by process_ui_events
+_tasks: dict[str, threading.Thread] = {}  # background tasks started with start_task, by name
+_tasks_lock = threading.Lock()
 
 
 # custom errors
@@ -132,6 +137,14 @@ def read_params(path="params.APYL") -> dict[str, str | int | list]:
                         params["branch"] = value
                     else:
                         log_error(208, f"The branch parameter in the params.APYL file is invalid: \"{value}\"")
+                elif line.startswith("updatesource="):  # optional
+                    params["updatesource"] = line.split("=", 1)[1]
+                elif line.startswith("updatecheckinterval="):  # optional
+                    value = line.split("=", 1)[1]
+                    if value.isnumeric() and int(value) > 0:
+                        params["updatecheckinterval"] = int(value)
+                    else:
+                        log_error(209, f"The updatecheckinterval parameter in the params.APYL file is invalid: \"{value}\"")
                 else:
                     log_error(201, f"params file line unknown : \"{line}\"")
         for param in ["language", "appearance", "size", "defaultfilter", "stoplauncherwhengame", "lastgame", "ignoredmessages", "branch"]:
@@ -168,19 +181,7 @@ def is_lng_file_valid(path: str) -> bool:
     :param path: path of the file to verify
     :return: True if the file is valid, else : False
     """
-    with open(path, "r", encoding="utf-8") as f:
-        lines = f.readlines()
-        for value, index in [
-                            ("WINDOW:\n", _language_separators_indexes[0]),
-                            ("HOME:\n", _language_separators_indexes[1]),
-                            ("APPS:\n", _language_separators_indexes[2]),
-                            ("ADD:\n", _language_separators_indexes[3]),
-                            ("UPDATES:\n", _language_separators_indexes[4]),
-                            ("OPTIONS:\n", _language_separators_indexes[5]),
-                            ("DIALOGS:\n", _language_separators_indexes[6])]:
-            if value not in lines or lines.count(value) != 1 or lines.index(value) != index:
-                return False
-        return True
+    return up.is_lng_file_valid(path, _language_separators_indexes[0:7])
 
 
 def load_language(lang: str) -> dict[str, list[str]]:
@@ -548,6 +549,46 @@ def get_coordinates_from_root(widget) -> tuple[int, int]:
     return x, y
 
 
+def post_ui_event(func, *args):
+    """Asks the Tk thread to call the given function, must be used by the background threads instead of touching the widgets
+
+    :param func: function to call on the Tk thread
+    :param args: arguments to give to the function
+    """
+    _ui_events.put((func, args))
+
+
+def process_ui_events():
+    """ Calls the functions posted with post_ui_event, runs on the Tk thread every 50ms """
+    try:
+        while True:
+            try:
+                func, args = _ui_events.get_nowait()
+            except queue.Empty:
+                break
+            func(*args)
+    finally:
+        win.after(50, process_ui_events)
+
+
+def start_task(name: str, target, *args) -> bool:
+    """Starts the given function in a new background thread, unless a task with the same name is still running
+
+    :param name: name of the task (and of the thread)
+    :param target: function to execute in the thread
+    :param args: arguments to give to the function
+    :return: True if the task was started, False if it was already running
+    """
+    with _tasks_lock:
+        thread = _tasks.get(name)
+        if thread is not None and thread.is_alive():
+            return False
+        thread = threading.Thread(target=target, args=args, name=name, daemon=True)
+        _tasks[name] = thread
+        thread.start()
+    return True
+
+
 # checking cwd
 if getattr(sys, 'frozen', False) and hasattr(sys, '_MEIPASS'):  # running as .exe
     if os.path.dirname(sys.executable) != os.getcwd():  # .exe path is not cwd
@@ -595,6 +636,7 @@ else:
     }
     with open("params.APYL", "x"):
         write_params(params)
+up.set_update_source(params.get("updatesource"))
 
 # loading language
 language = load_language(params["language"])
@@ -709,47 +751,61 @@ class HomeTab:
 
         :param version_message: if set to a version string, shows update messages for versions from the given version up to the current version of the launcher
         """
-        if "checking for messages" not in threading.enumerate():
-            threading.Thread(target=lambda version=version_message: home_tab._show_launcher_update_messages(version), name="checking for messages", daemon=True).start()
+        start_task("checking for messages", home_tab._show_launcher_update_messages, version_message)
 
     @staticmethod
     def _show_launcher_update_messages(version_message: str = None):
-        """Checks if there are available update messages to show and shows them if available
+        """Checks if there are available update messages to show and asks the Tk thread to show them if available
 
         :param version_message: if set to a version string, shows update messages for versions from the given version up to the current version of the launcher
         """
         if version_message is not None:
             message = up.check_for_version_message(version_message, _version, params["branch"])
             if message is not None:
-                toplevel = ctk.CTkToplevel()
-                toplevel.title(language["UPDATES"][12])
-                toplevel.geometry("900x500")
-                win.after(200, lambda: toplevel.iconbitmap(tl.get_resource_path("launcher data/launcher_icon.ico")))  # wait at least 200ms because else it doesn't work
-                win.after(100, lambda: toplevel.lift())  # wait at least 100ms because else it doesn't work
-                textbox = ctk.CTkTextbox(toplevel)
-                textbox.insert("1.0", message)
-                textbox.configure(state="disabled")
-                textbox.pack(expand=True, fill="both")
+                post_ui_event(home_tab._show_update_message, message)
             else:
                 log_error(116, f"The retrieve of the launcher update message failed for versions {version_message} to {_version}")
 
+    @staticmethod
+    def _show_update_message(message: str):
+        """Shows the given update message in a new toplevel, must be called on the Tk thread
+
+        :param message: update message to show
+        """
+        toplevel = ctk.CTkToplevel()
+        toplevel.title(language["UPDATES"][12])
+        toplevel.geometry("900x500")
+        win.after(200, lambda: toplevel.iconbitmap(tl.get_resource_path("launcher data/launcher_icon.ico")))  # wait at least 200ms because else it doesn't work
+        win.after(100, lambda: toplevel.lift())  # wait at least 100ms because else it doesn't work
+        textbox = ctk.CTkTextbox(toplevel)
+        textbox.insert("1.0", message)
+        textbox.configure(state="disabled")
+        textbox.pack(expand=True, fill="both")
+
     @staticmethod
     def show_launcher_normal_messages(ignore_ignored_messages=True):
         """Starts the search for normal messages in a new thread
 
         :param ignore_ignored_messages: if set to True, ignores the messages marked as ignored in the params dict
         """
-        if "checking for messages" not in threading.enumerate():
-            threading.Thread(target=home_tab._show_launcher_normal_messages, args=[ignore_ignored_messages], name="checking for messages", daemon=True).start()
+        start_task("checking for messages", home_tab._show_launcher_normal_messages, ignore_ignored_messages)
 
     def _show_launcher_normal_messages(self, ignore_ignored_messages=True):
-        """Checks if there are available messages to show and shows them if available
+        """Checks if there are available messages to show and asks the Tk thread to show them if available
 
+        :param ignore_ignored_messages: if set to True, ignores the messages marked as ignored in the params dict
+        """
+        response = up.check_for_launcher_message(params["branch"])
+        post_ui_event(self._show_normal_messages, response, ignore_ignored_messages)
+
+    def _show_normal_messages(self, response: dict[int, str] | None, ignore_ignored_messages=True):
+        """Shows the given messages in a new toplevel, must be called on the Tk thread
+
+        :param response: messages returned by up.check_for_launcher_message
         :param ignore_ignored_messages: if set to True, ignores the messages marked as ignored in the params dict
         """
         self.messages_ids_list.clear()
         self.closing_messages()
-        response = up.check_for_launcher_message(params["branch"])
         if response is not None:
             final_message = ""
             for message_id, message in response.items():
@@ -782,7 +838,7 @@ class HomeTab:
             self.messages_toplevel.destroy()
 
     def show_all_launcher_messages(self, version_message: str = None, ignore_ignored_messages=True):
-        """Checks if there are available messages (normal and update messages) to show and shows them if available. Does not execute in a new thread
+        """Checks if there are available messages (normal and update messages) to show and asks the Tk thread to show them if available. Does not execute in a new thread
 
         :param version_message: if set to a version string, shows update messages for versions from the given version up to the current version of the launcher
         :param ignore_ignored_messages: if set to True, ignores the messages marked as ignored in the params dict
@@ -1753,10 +1809,8 @@ class SingleAppTab:
                     app_format = gi.get_type_file(new_path)
                     if app_format == "exe":
                         icon_path = gi.get_icon_from_exe(new_path, f"icons/{self.current_app}")
-                    elif app_format == "steam" or app_format == "uplay":
-                        icon_path = gi.get_icon_steam_uplay(new_path, f"icons/{self.current_app}")
-                    elif app_format == "epic":
-                        icon_path = gi.get_icon_epic(new_path, f"icons/{self.current_app}")
+                    elif app_format in sd.stores:
+                        icon_path = gi.get_icon_from_url(new_path, f"icons/{self.current_app}")
                     else:  # unknown / error
                         tl.showwarning(language["ADD"][0], language["ADD"][10])
                         icon_path = ""
@@ -1856,8 +1910,10 @@ class AddGameTab:
         self.auto_detect_frame = ctk.CTkFrame(root_frame, fg_color="transparent")
 
         self.add_folder_button = ctk.CTkButton(self.auto_detect_frame, text=language["ADD"][23], command=self.add_folder)
+        self.installed_games_button = ctk.CTkButton(self.auto_detect_frame, text=language["ADD"][31], command=self.add_installed_games)
 
         self.add_folder_button.grid(row=0, column=0, padx=5, pady=30, sticky="e")
+        self.installed_games_button.grid(row=1, column=0, padx=5, pady=0, sticky="e")
 
         self.reload()
 
@@ -1908,6 +1964,7 @@ class AddGameTab:
 
         # auto detect
         self.add_folder_button.configure(text=language["ADD"][23])
+        self.installed_games_button.configure(text=language["ADD"][31])
 
         self.reload()
 
@@ -1974,14 +2031,10 @@ class AddGameTab:
                         app_format = gi.get_type_file(path)
                         if app_format == "exe":
                             icon_path = gi.get_icon_from_exe(path, f"icons/{name}")
-                        elif app_format == "steam" or app_format == "uplay":
-                            if os.path.abspath(os.path.dirname(path)) != os.path.abspath("url shortcuts") and os.path.basename(path) == f"{name}.url":
-                                path = shutil.copy2(path, f"url shortcuts/{name}.url")
-                            icon_path = gi.get_icon_steam_uplay(path, f"icons/{name}")
-                        elif app_format == "epic":
+                        elif app_format in sd.stores:
                             if os.path.abspath(os.path.dirname(path)) != os.path.abspath("url shortcuts") and os.path.basename(path) == f"{name}.url":
                                 path = shutil.copy2(path, f"url shortcuts/{name}.url")
-                            icon_path = gi.get_icon_epic(path, f"icons/{name}")
+                            icon_path = gi.get_icon_from_url(path, f"icons/{name}")
                         else:  # unknown / error
                             tl.showwarning(language["ADD"][0], language["ADD"][10])
                             icon_path = ""
@@ -2036,46 +2089,107 @@ class AddGameTab:
         """ Function assigned to a button, when called, asks for a folder containing games to add to the launcher """
         folder = tl.askdir(language["ADD"][23], initialdir=os.path.normpath(os.path.expanduser("~/Desktop")))
         if folder is not None:
-            files_list = []
-            for item in os.listdir(folder):
-                if os.path.isfile(os.path.join(folder, item)):
-                    if gi.get_type_file(os.path.join(folder, item)) != "unknown":  # valid file
-                        files_list.append(item)
-                    elif item.endswith(".lnk"):
-                        shell = win32com.client.Dispatch("WScript.Shell")
-                        shortcut = shell.CreateShortCut(os.path.join(folder, item))
-                        target_path = shortcut.Targetpath
-                        if os.path.isfile(target_path) and target_path.endswith(".exe"):
-                            files_list.append(item)
-
-            if files_list:
-                toplevel = ctk.CTkToplevel()
-                toplevel.title(language["ADD"][23])
-                toplevel.geometry("300x450")
-
-                label = ctk.CTkLabel(toplevel, text=language["ADD"][24])
-                scrollable_frame = ctk.CTkScrollableFrame(toplevel)
-                validate_button = ctk.CTkButton(toplevel, text=language["ADD"][1], command=lambda: self.add_folder_validation(scrollable_frame, toplevel))
-                cancel_button = ctk.CTkButton(toplevel, text=language["APPS"][32], command=toplevel.destroy)
-
-                label.pack(side="top", padx=3, pady=3)
-                scrollable_frame.pack(expand=True, fill="both", side="top", pady=3)
-                validate_button.pack(expand=True, fill="both", side="right", padx=3, pady=3)
-                cancel_button.pack(expand=True, fill="both", side="left", padx=3, pady=3)
-
-                # fill the scrollable frame with the games
-                for x in range(len(files_list)):
-                    checkbox = ctk.CTkCheckBox(scrollable_frame, text=".".join(files_list[x].split(".")[:-1]), onvalue=os.path.join(folder, files_list[x]))  # using the onvalue argument to transfer the absolute path to the add_folder_validation method (I know I should not do that but it works)
-                    checkbox.select()
-                    checkbox.grid(row=x, column=0, sticky="w", padx=2, pady=3)
-            else:  # files_list empty
-                tl.showinfo(language["ADD"][23], language["ADD"][27])
+            toplevel, scrollable_frame, cancel_event = self._create_detection_toplevel(language["ADD"][23])
+            # fill the scrollable frame with the games while they are detected
+            if not start_task("detecting games in folder", self._add_folder_scan, folder, toplevel, scrollable_frame, cancel_event):  # the previous scan is still stopping
+                toplevel.destroy()
+
+    def add_installed_games(self):
+        """ Function assigned to a button, when called, detects the games installed with the stores to add them to the launcher """
+        toplevel, scrollable_frame, cancel_event = self._create_detection_toplevel(language["ADD"][31])
+        if not start_task("detecting installed games", self._installed_games_scan, toplevel, scrollable_frame, cancel_event):  # the previous detection is still running
+            toplevel.destroy()
+
+    def _create_detection_toplevel(self, title: str) -> tuple[ctk.CTkToplevel, ctk.CTkScrollableFrame, threading.Event]:
+        """Creates the toplevel showing the detected games to select the ones to add
+
+        :param title: title of the toplevel
+        :return: the toplevel, the frame to add the games checkboxes to and the event set when the detection has to stop
+        """
+        cancel_event = threading.Event()
+
+        toplevel = ctk.CTkToplevel()
+        toplevel.title(title)
+        toplevel.geometry("300x450")
+        toplevel.protocol("WM_DELETE_WINDOW", lambda: self.add_folder_cancel(toplevel, cancel_event))
+
+        label = ctk.CTkLabel(toplevel, text=language["ADD"][24])
+        scrollable_frame = ctk.CTkScrollableFrame(toplevel)
+        validate_button = ctk.CTkButton(toplevel, text=language["ADD"][1], command=lambda: [cancel_event.set(), self.add_folder_validation(scrollable_frame, toplevel)])
+        cancel_button = ctk.CTkButton(toplevel, text=language["APPS"][32], command=lambda: self.add_folder_cancel(toplevel, cancel_event))
+
+        label.pack(side="top", padx=3, pady=3)
+        scrollable_frame.pack(expand=True, fill="both", side="top", pady=3)
+        validate_button.pack(expand=True, fill="both", side="right", padx=3, pady=3)
+        cancel_button.pack(expand=True, fill="both", side="left", padx=3, pady=3)
+        return toplevel, scrollable_frame, cancel_event
+
+    def _add_folder_scan(self, folder: str, toplevel: ctk.CTkToplevel, frame: ctk.CTkScrollableFrame, cancel_event: threading.Event):
+        """Detects the games in the given folder and sends them to the given frame, only new or modified files are analysed. Runs in a background thread
+
+        :param folder: folder to scan
+        :param toplevel: toplevel containing the frame
+        :param frame: frame to add the games checkboxes to
+        :param cancel_event: event set when the scan has to stop
+        """
+        scan_manifest = gd.load_scan_manifest()
+        for name, file_type, changed in gd.iter_rescan_folder(folder, scan_manifest, cancel_event):
+            if file_type != "unknown":  # only preselect the games that appeared since the last scan
+                post_ui_event(self.add_detected_game, toplevel, frame, ".".join(name.split(".")[:-1]), os.path.join(folder, name), changed)
+        gd.save_scan_manifest(scan_manifest)
+        post_ui_event(self.detection_finished, toplevel, frame, language["ADD"][27])
+
+    def _installed_games_scan(self, toplevel: ctk.CTkToplevel, frame: ctk.CTkScrollableFrame, cancel_event: threading.Event):
+        """Detects the games installed with the stores from their library manifests and sends them to the given frame. Runs in a background thread
+
+        :param toplevel: toplevel containing the frame
+        :param frame: frame to add the games checkboxes to
+        :param cancel_event: event set when the detection has to stop
+        """
+        games = gd.detect_installed_games()
+        for game in sorted(games, key=lambda game: game["name"].lower()):
+            if cancel_event.is_set():
+                return
+            name = "".join(char for char in game["name"] if check_name(char))
+            post_ui_event(self.add_detected_game, toplevel, frame, name, game["url"], name not in apps)  # only preselect the games not added yet
+        post_ui_event(self.detection_finished, toplevel, frame, language["ADD"][32])
+
+    @staticmethod
+    def add_detected_game(toplevel: ctk.CTkToplevel, frame: ctk.CTkScrollableFrame, name: str, path: str, selected: bool):
+        """Adds a detected game to the given frame
+
+        :param toplevel: toplevel containing the frame, nothing is done if it was closed
+        :param frame: frame to add the game checkbox to
+        :param name: name proposed for the game
+        :param path: absolute path of the game file, or url launching the game for the games installed with a store
+        :param selected: if set to True, the game is preselected
+        """
+        if not toplevel.winfo_exists():
+            return
+        checkbox = ctk.CTkCheckBox(frame, text=name, onvalue=path)  # using the onvalue argument to transfer the path to the add_folder_validation method (I know I should not do that but it works)
+        if selected:
+            checkbox.select()
+        checkbox.grid(row=len(frame.winfo_children()) - 1, column=0, sticky="w", padx=2, pady=3)
+
+    @staticmethod
+    def detection_finished(toplevel: ctk.CTkToplevel, frame: ctk.CTkScrollableFrame, message: str):
+        """ Closes the given toplevel and shows the given message if no game was detected """
+        if toplevel.winfo_exists() and not frame.winfo_children():
+            title = toplevel.title()
+            toplevel.destroy()
+            tl.showinfo(title, message)
+
+    @staticmethod
+    def add_folder_cancel(toplevel: ctk.CTkToplevel, cancel_event: threading.Event):
+        """ Stops the detection of the games and closes the add folder toplevel """
+        cancel_event.set()
+        toplevel.destroy()
 
     def add_folder_validation(self, frame: ctk.CTkScrollableFrame, toplevel: ctk.CTkToplevel):
-        selected_list = []
+        selected_list = []  # (name, path)
         for children in frame.winfo_children():
             if children.get():  # selected
-                selected_list.append(children.cget("onvalue"))
+                selected_list.append((children.cget("text"), children.cget("onvalue")))
         toplevel.destroy()
         if not selected_list:
             return
@@ -2096,14 +2210,15 @@ class AddGameTab:
         else:
             folder = "."
 
-        for path in selected_list:
-            name = ".".join(os.path.basename(path).split(".")[:-1])
+        for name, path in selected_list:
             if name in apps:
                 if tl.askyesno(language["ADD"][23], f"{name}{language["ADD"][25]}"):
                     while True:
                         name = tl.askstring(language["ADD"][23], language["ADD"][26])
                         if name in apps and name is not None:
                             tl.showwarning(language["ADD"][23], language["ADD"][9])
+                        elif name is not None and not check_name(name):
+                            tl.showwarning(language["ADD"][23], language["ADD"][13])
                         else:
                             break
                 else:
@@ -2111,6 +2226,11 @@ class AddGameTab:
             if name is None:  # user canceled renaming
                 continue
 
+            if "://" in path:  # game installed with a store: saved as a .url shortcut of the store
+                with open(f"url shortcuts/{name}.url", "w", encoding="utf-8") as f:
+                    f.write(f"[InternetShortcut]\nURL={path}\n")
+                path = f"url shortcuts/{name}.url"
+
             if path.endswith(".lnk"):
                 shell = win32com.client.Dispatch("WScript.Shell")
                 shortcut = shell.CreateShortCut(path)
@@ -2119,14 +2239,10 @@ class AddGameTab:
             app_format = gi.get_type_file(path)
             if app_format == "exe":
                 icon_path = gi.get_icon_from_exe(path, f"icons/{name}")
-            elif app_format == "steam" or app_format == "uplay":
-                if os.path.abspath(os.path.dirname(path)) != os.path.abspath("url shortcuts") and os.path.basename(path) == f"{name}.url":
-                    path = shutil.copy2(path, f"url shortcuts/{name}.url")
-                icon_path = gi.get_icon_steam_uplay(path, f"icons/{name}")
-            elif app_format == "epic":
+            elif app_format in sd.stores:
                 if os.path.abspath(os.path.dirname(path)) != os.path.abspath("url shortcuts") and os.path.basename(path) == f"{name}.url":
                     path = shutil.copy2(path, f"url shortcuts/{name}.url")
-                icon_path = gi.get_icon_epic(path, f"icons/{name}")
+                icon_path = gi.get_icon_from_url(path, f"icons/{name}")
             else:  # unknown / error
                 icon_path = ""
             if icon_path is None:
@@ -2162,7 +2278,18 @@ class UpdatesTab:
         self.launcher_state_label = ctk.CTkLabel(root_frame, text=language["UPDATES"][5])
         self.launcher_button = ctk.CTkButton(root_frame, text=language["UPDATES"][4], command=self.update_launcher, state="disabled")
 
-        self.check_updates()
+        # background checks, the last result is shown until the first check is done
+        self.git_versions = "connexion error"
+        self.refresh_requested = False  # True when the user asked for a check, the end of the check is notified
+        self.notified_versions = None  # versions of the last update notified, the periodic checks only notify a new version
+        self.scheduler = up.UpdateScheduler(["launcher", "updater"], lambda: params["branch"], lambda versions: post_ui_event(self._versions_checked, versions), interval=params.get("updatecheckinterval", 60) * 60)
+        cached_versions = self.scheduler.get_cached_versions()
+        if cached_versions is not None:
+            self.git_versions = cached_versions
+            post_ui_event(self.has_to_reload.set, True)  # when the window is fully created
+        else:
+            self.launcher_state_label.configure(text=language["UPDATES"][2])
+        self.scheduler.start()
 
     def show(self):
         if not self.active:
@@ -2193,16 +2320,17 @@ class UpdatesTab:
 
     def check_updates(self):
         """ Starts the refreshing process to know what updates are available """
-        if "updater: checking updates" not in [thread.name for thread in threading.enumerate()]:  # not already refreshing
-            self.launcher_state_label.configure(text=language["UPDATES"][2])
-            self.launcher_button.configure(state="disabled")
-
-            thread = threading.Thread(target=self._check_updates, name="updater: checking updates", daemon=True)
-            thread.start()
-
-    def _check_updates(self):
-        """ Checks for updates and reloads the tab when it's done """
-        self.git_versions = up.check_versions(["launcher", "updater"], params["branch"])
+        self.launcher_state_label.configure(text=language["UPDATES"][2])
+        self.launcher_button.configure(state="disabled")
+        self.refresh_requested = True
+        self.scheduler.check_now()
+
+    def _versions_checked(self, versions: dict[str, str] | str):
+        """ Called on the Tk thread when the scheduler checked the versions, reloads the tab """
+        self.git_versions = versions
+        if self.refresh_requested:
+            self.refresh_requested = False
+            show_message(language["UPDATES"][3], 3000)
         self.has_to_reload.set(True)
 
     def reload(self, *args):
@@ -2218,7 +2346,7 @@ class UpdatesTab:
                 if installing:
                     self.launcher_state_label.configure(text=language["UPDATES"][14])
                     self.launcher_button.configure(state="disabled")
-                elif _version < self.git_versions["launcher"] or (self.git_versions["updater"] != "unknown" and os.path.isfile("APY! Launcher Updater.exe") and up.get_file_version("APY! Launcher Updater.exe") < self.git_versions["updater"]):
+                elif up.is_newer_version(self.git_versions["launcher"], _version) or (self.git_versions["updater"] != "unknown" and os.path.isfile("APY! Launcher Updater.exe") and up.is_newer_version(self.git_versions["updater"], up.get_file_version("APY! Launcher Updater.exe"))):
                     self.launcher_state_label.configure(text=language["UPDATES"][9])
                     self.launcher_button.configure(state="normal")
                     self.launcher_has_to_update = True
@@ -2227,7 +2355,9 @@ class UpdatesTab:
                     self.launcher_button.configure(state="disabled")
 
             home_tab.reload()
-            show_message(language["UPDATES"][3], 3000)
+            if self.launcher_has_to_update and self.git_versions != self.notified_versions:  # new version found
+                show_message(language["UPDATES"][9], 3000)
+                self.notified_versions = self.git_versions
 
             self.has_to_reload.set(False)
 
@@ -2262,13 +2392,13 @@ class UpdatesTab:
         global installing
         if os.path.isfile("APY! Launcher Updater.exe"):
             if self.git_versions["updater"] != "unknown":
-                if up.get_file_version("APY! Launcher Updater.exe") < self.git_versions["updater"]:
+                if up.is_newer_version(self.git_versions["updater"], up.get_file_version("APY! Launcher Updater.exe")):
                     if not installing:
                         installing = True
                         self.launcher_state_label.configure(text=language["UPDATES"][14])
                         self.launcher_button.configure(state="disabled")
-                        threading.Thread(target=up.update_updater, args=[params["branch"], self.updater_update_finished]).start()
-                elif _version < self.git_versions["launcher"]:
+                        start_task("updating updater", up.update_updater, params["branch"], lambda code: post_ui_event(self.updater_update_finished, code))
+                elif up.is_newer_version(self.git_versions["launcher"], _version):
                     if tl.askyesno(language["UPDATES"][0], language["UPDATES"][10]):
                         if on_closing():
                             os.startfile("APY! Launcher Updater.exe")
@@ -2450,6 +2580,7 @@ class OptionsTab:
 
         params["stoplauncherwhengame"] = int(self.stoplauncher_variable.get())
 
+        previous_branch = params["branch"]
         if not self.branch_variable.get():  # main branch
             params["branch"] = "main"
         else:  # Development branch
@@ -2466,6 +2597,8 @@ class OptionsTab:
         tl._language = language["DIALOGS"]  # changing toplevel widgets language
 
         write_params(params)
+        if params["branch"] != previous_branch:  # the versions shown are the ones of the previous branch
+            updates_tab.scheduler.check_now()
         reload_window(language["WINDOW"][5])
         show_message(language["OPTIONS"][4], 3000)
 
@@ -2544,10 +2677,11 @@ if len(sys.argv) > 1:
         v = None
 else:
     v = None
-threading.Thread(target=lambda version=v: home_tab.show_all_launcher_messages(version), name="checking for messages", daemon=True).start()
+start_task("checking for messages", home_tab.show_all_launcher_messages, v)
 
 # launching main window
 home_tab.show()
+process_ui_events()
 win.bind("<Configure>", change_size)
 
 win.mainloop()
@@ -12,25 +12,645 @@ See the license in the COPYING file or at <https://www.gnu.org/licenses/>.
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import zipfile
+import io
 import os
 import shutil
-import win32com.client
-import pythoncom
+import json
+import hashlib
+import tempfile
+import threading
+import time
+import random
+import struct
+import re
+import bisect
+import functools
+from abc import ABC, abstractmethod
+from urllib.parse import quote
+from concurrent.futures import ThreadPoolExecutor
+
+
+class UpdateClient:
+    """ HTTP client shared by the update functions: keeps the connexions to GitHub open, retries failed requests and caches the downloaded texts on disk """
+    def __init__(self, timeout=(5, 10), retries=3, backoff_factor=0.5, cache_dir="cache/http cache"):
+        """
+        :param timeout: default timeout of the requests: (connect timeout, read timeout) in seconds
+        :param retries: number of times a request is retried on connexion errors or server errors (5xx)
+        :param backoff_factor: factor of the exponential waiting time between retries
+        :param cache_dir: directory to cache the texts in, the texts are only cached if the parent directory exists (the "cache" folder of the launcher)
+        """
+        self.timeout = timeout
+        self.cache_dir = cache_dir
+        self.session = requests.Session()
+        retry = Retry(total=retries, backoff_factor=backoff_factor, status_forcelist=(500, 502, 503, 504), allowed_methods=("GET", "HEAD"), raise_on_status=False)
+        adapter = HTTPAdapter(max_retries=retry, pool_connections=4, pool_maxsize=8)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """ Sends a GET request with the session, uses the default timeout if none is given """
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.get(url, **kwargs)
+
+    def _get_cache_file(self, url: str) -> str | None:
+        """ Returns the path of the file caching the given url, None if the texts cannot be cached """
+        parent_dir = os.path.dirname(self.cache_dir)
+        if parent_dir != "" and not os.path.isdir(parent_dir):
+            return None
+        os.makedirs(self.cache_dir, exist_ok=True)  # the launcher threads can call this at the same time
+        return os.path.join(self.cache_dir, hashlib.sha1(url.encode("utf-8")).hexdigest() + ".json")
+
+    def get_text(self, url: str, cache=True) -> str | None:
+        """Downloads the given text, if cache is set to True, the text is cached on disk and only downloaded again if it was modified (ETag / Last-Modified)
+
+        :param url: url of the text to download
+        :param cache: optional, if set to True, uses the cached version of the text if it was not modified
+        :return: downloaded text or None if the server did not return the text (error 404...)
+        :raise requests.ConnectionError: if the connexion failed
+        :raise requests.Timeout: if the server did not respond in time
+        """
+        cache_file = self._get_cache_file(url) if cache else None
+        cached = None
+        headers = {}
+        if cache_file is not None and os.path.isfile(cache_file):
+            try:
+                with open(cache_file, "r", encoding="utf-8") as f:
+                    cached = json.load(f)
+            except (OSError, ValueError):
+                cached = None
+            if isinstance(cached, dict) and isinstance(cached.get("text"), str):
+                if cached.get("etag"):
+                    headers["If-None-Match"] = cached["etag"]
+                if cached.get("last_modified"):
+                    headers["If-Modified-Since"] = cached["last_modified"]
+            else:  # invalid cache file
+                cached = None
+        response = self.get(url, headers=headers)
+        if response.status_code == 304 and cached is not None:
+            return cached["text"]
+        elif response.status_code == 200:
+            if cache_file is not None and (response.headers.get("ETag") or response.headers.get("Last-Modified")):
+                with open(cache_file, "w", encoding="utf-8") as f:
+                    json.dump({"url": url, "etag": response.headers.get("ETag"), "last_modified": response.headers.get("Last-Modified"), "text": response.text}, f)
+            return response.text
+        else:
+            return None
+
+    def download_file(self, url: str, destination: str, sha256: str = None, progress_callback=None, attempts=3, chunk_size=65536, cancel_event: threading.Event = None) -> bool:
+        """Downloads the given file to the destination by chunks. The file is downloaded to destination + ".part" and the download resumes from this file if it already exists (HTTP Range)
+
+        :param url: url of the file to download
+        :param destination: path to write the file to
+        :param sha256: optional, hexadecimal SHA-256 digest the downloaded file must have
+        :param progress_callback: optional, function called after each chunk with the number of downloaded bytes and the total number of bytes (None if unknown)
+        :param attempts: optional, number of times the download is resumed if the connexion is lost
+        :param chunk_size: optional, size of the chunks written to disk
+        :param cancel_event: optional, event stopping the download when it is set (checked between the chunks), the partial file is kept
+        :return: True if the file was downloaded (and verified), False if the server did not return the file, if the digest did not match or if the download was cancelled
+        :raise requests.ConnectionError: if the connexion failed on the last attempt, the partial file is kept to resume the download later
+        :raise requests.Timeout: if the server did not respond in time on the last attempt
+        """
+        part_file = destination + ".part"
+        for attempt in range(attempts):
+            try:
+                if not self._download_part(url, part_file, progress_callback, chunk_size, cancel_event):
+                    return False
+            except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError) as e:
+                if attempt == attempts - 1:
+                    if isinstance(e, requests.exceptions.ChunkedEncodingError):
+                        raise requests.ConnectionError(e) from e
+                    raise
+            else:
+                break
+        if sha256 is not None:
+            hasher = hashlib.sha256()
+            with open(part_file, "rb") as f:
+                for chunk in iter(lambda: f.read(1048576), b""):
+                    hasher.update(chunk)
+            if hasher.hexdigest() != sha256.lower():
+                os.remove(part_file)
+                if os.path.isfile(part_file + ".etag"):
+                    os.remove(part_file + ".etag")
+                return False
+        os.replace(part_file, destination)
+        if os.path.isfile(part_file + ".etag"):
+            os.remove(part_file + ".etag")
+        return True
+
+    def _download_part(self, url: str, part_file: str, progress_callback, chunk_size: int, cancel_event: threading.Event = None) -> bool:
+        """ Downloads the given file to part_file, resumes the download if part_file exists. Returns False if the server did not return the file or if the download was cancelled """
+        if cancel_event is not None and cancel_event.is_set():
+            return False
+        downloaded = os.path.getsize(part_file) if os.path.isfile(part_file) else 0
+        headers = {}
+        if downloaded:
+            headers["Range"] = f"bytes={downloaded}-"
+            if os.path.isfile(part_file + ".etag"):  # the server sends the whole file if it changed since the partial download
+                with open(part_file + ".etag", "r", encoding="utf-8") as f:
+                    headers["If-Range"] = f.read()
+        with self.get(url, headers=headers, stream=True) as response:
+            if response.status_code == 206:  # resuming
+                mode = "ab"
+                total = response.headers.get("Content-Range", "").rpartition("/")[2]
+            elif response.status_code == 200:  # whole file
+                mode = "wb"
+                downloaded = 0
+                total = response.headers.get("Content-Length", "")
+            elif response.status_code == 416 and downloaded:  # the partial file is already complete
+                return True
+            else:
+                return False
+            total = int(total) if total.isnumeric() else None
+            if response.headers.get("ETag"):
+                with open(part_file + ".etag", "w", encoding="utf-8") as f:
+                    f.write(response.headers["ETag"])
+            with open(part_file, mode) as f:
+                for chunk in response.iter_content(chunk_size):
+                    if cancel_event is not None and cancel_event.is_set():
+                        return False
+                    f.write(chunk)
+                    downloaded += len(chunk)
+                    if progress_callback is not None:
+                        progress_callback(downloaded, total)
+        return True
+
+
+class HTTPRangeFile(io.RawIOBase):
+    """ Read-only file reading a remote file with HTTP Range requests, allows zipfile to only download the needed members of a remote archive """
+    def __init__(self, update_client: UpdateClient, url: str):
+        """
+        :param update_client: client to send the requests with
+        :param url: url of the remote file, the server has to support Range requests
+        :raise OSError: if the server does not support Range requests or did not return the file
+        :raise requests.ConnectionError: if the connexion failed
+        :raise requests.Timeout: if the server did not respond in time
+        """
+        super().__init__()
+        self.client = update_client
+        response = update_client.session.head(url, allow_redirects=True, timeout=update_client.timeout)
+        if response.status_code != 200 or response.headers.get("Accept-Ranges") != "bytes" or not response.headers.get("Content-Length", "").isnumeric():
+            raise OSError(f"The server does not support range requests for {url}")
+        self.url = response.url  # final url after the redirections (github -> raw.githubusercontent)
+        self.size = int(response.headers["Content-Length"])
+        self.position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self.position
+
+    def seek(self, offset: int, whence=io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            self.position = offset
+        elif whence == io.SEEK_CUR:
+            self.position += offset
+        else:  # io.SEEK_END
+            self.position = self.size + offset
+        return self.position
+
+    def readinto(self, buffer) -> int:
+        if self.position >= self.size or len(buffer) == 0:
+            return 0
+        end = min(self.position + len(buffer), self.size) - 1
+        response = self.client.get(self.url, headers={"Range": f"bytes={self.position}-{end}"})
+        if response.status_code != 206:
+            raise OSError(f"The server did not return the requested range of {self.url} (status code {response.status_code})")
+        data = response.content
+        buffer[:len(data)] = data
+        self.position += len(data)
+        return len(data)
+
+
+class UpdateSource(ABC):
+    """ Place the update files (content of the "Downloads" folder of the repository) are read from, base class of the update sources """
+    @abstractmethod
+    def get_text(self, file_path: str, cache=True) -> str | None:
+        """Returns the content of the given text file
+
+        :param file_path: path of the file relative to the source ("Versions.txt", "Messages/Message.txt"...)
+        :param cache: optional, if set to True, the source can use a cached version of the file if it was not modified
+        :return: content of the file, None if the file does not exist
+        :raise requests.ConnectionError: if the connexion failed (remote sources)
+        :raise requests.Timeout: if the server did not respond in time (remote sources)
+        """
+
+    @abstractmethod
+    def download_file(self, file_path: str, destination: str, sha256: str = None, progress_callback=None, cancel_event: threading.Event = None) -> bool:
+        """Copies the given file to the destination
+
+        :param file_path: path of the file relative to the source
+        :param destination: path to write the file to
+        :param sha256: optional, hexadecimal SHA-256 digest the file must have
+        :param progress_callback: optional, function called with the number of copied bytes and the total number of bytes (None if unknown)
+        :param cancel_event: optional, event stopping the copy when it is set
+        :return: True if the file was copied (and verified), False if the file does not exist, if the digest did not match or if the copy was cancelled
+        :raise requests.ConnectionError: if the connexion failed (remote sources)
+        :raise requests.Timeout: if the server did not respond in time (remote sources)
+        """
+
+    @abstractmethod
+    def open_archive(self, file_path: str) -> zipfile.ZipFile:
+        """Opens the given zip archive without copying it entirely
+
+        :param file_path: path of the archive relative to the source
+        :return: opened archive
+        :raise OSError: if the archive cannot be opened this way
+        :raise requests.ConnectionError: if the connexion failed (remote sources)
+        :raise requests.Timeout: if the server did not respond in time (remote sources)
+        """
+
+    def get_digest(self, file_path: str) -> str | None:
+        """Returns the SHA-256 digest published for the given file (in the file path + ".sha256")
+
+        :param file_path: path of the file relative to the source
+        :return: hexadecimal digest, None if no digest was published
+        """
+        digest = self.get_text(file_path + ".sha256", cache=False)
+        if digest is None or digest.strip() == "":
+            return None
+        return digest.split()[0].lower()
+
+
+class HTTPUpdateSource(UpdateSource):
+    """ Update files downloaded from a web server (GitHub by default or a mirror) """
+    def __init__(self, base_url: str, update_client: UpdateClient = None):
+        """
+        :param base_url: url of the folder containing the update files
+        :param update_client: optional, client to send the requests with, the client of the module by default
+        """
+        self.base_url = base_url if base_url.endswith("/") else base_url + "/"
+        self.client = update_client if update_client is not None else client
+
+    def get_url(self, file_path: str) -> str:
+        """ Returns the url of the given file """
+        return self.base_url + quote(file_path.replace("\\", "/"), safe="/!")
+
+    def get_text(self, file_path: str, cache=True) -> str | None:
+        return self.client.get_text(self.get_url(file_path), cache)
+
+    def download_file(self, file_path: str, destination: str, sha256: str = None, progress_callback=None, cancel_event: threading.Event = None) -> bool:
+        return self.client.download_file(self.get_url(file_path), destination, sha256, progress_callback, cancel_event=cancel_event)
+
+    def open_archive(self, file_path: str) -> zipfile.ZipFile:
+        return zipfile.ZipFile(io.BufferedReader(HTTPRangeFile(self.client, self.get_url(file_path)), 65536), "r")
+
+
+class DirectoryUpdateSource(UpdateSource):
+    """ Update files read from a local folder (copy of the "Downloads" folder, network share...) """
+    def __init__(self, folder: str):
+        """
+        :param folder: folder containing the update files
+        """
+        self.folder = folder
+
+    def get_text(self, file_path: str, cache=True) -> str | None:
+        full_path = os.path.join(self.folder, file_path)
+        if not os.path.isfile(full_path):
+            return None
+        with open(full_path, "r", encoding="utf-8", newline="") as f:
+            return f.read()
+
+    def download_file(self, file_path: str, destination: str, sha256: str = None, progress_callback=None, cancel_event: threading.Event = None) -> bool:
+        full_path = os.path.join(self.folder, file_path)
+        if not os.path.isfile(full_path) or (cancel_event is not None and cancel_event.is_set()):
+            return False
+        if sha256 is not None and get_file_sha256(full_path) != sha256.lower():
+            return False
+        shutil.copyfile(full_path, destination)
+        if progress_callback is not None:
+            size = os.path.getsize(destination)
+            progress_callback(size, size)
+        return True
+
+    def open_archive(self, file_path: str) -> zipfile.ZipFile:
+        return zipfile.ZipFile(os.path.join(self.folder, file_path), "r")
+
+
+class _TemporaryZipFile(zipfile.ZipFile):
+    """ Archive read from a temporary file, the file is closed (and deleted) with the archive """
+    def __init__(self, temporary_file):
+        """
+        :param temporary_file: opened temporary file containing the archive
+        """
+        self._temporary_file = temporary_file
+        super().__init__(temporary_file, "r")
+
+    def close(self):
+        try:
+            super().close()
+        finally:
+            self._temporary_file.close()
+
+
+class ZipUpdateSource(UpdateSource):
+    """ Update files read from a local zip bundle containing the update files at its root """
+    def __init__(self, bundle: str):
+        """
+        :param bundle: path of the zip bundle
+        """
+        self.bundle = bundle
+
+    def _get_member(self, archive: zipfile.ZipFile, file_path: str) -> zipfile.ZipInfo | None:
+        """ Returns the member of the bundle corresponding to the given file, None if it does not exist """
+        try:
+            return archive.getinfo(file_path.replace("\\", "/"))
+        except KeyError:
+            return None
+
+    def get_text(self, file_path: str, cache=True) -> str | None:
+        with zipfile.ZipFile(self.bundle, "r") as archive:
+            member = self._get_member(archive, file_path)
+            if member is None:
+                return None
+            return archive.read(member).decode("utf-8")
+
+    def download_file(self, file_path: str, destination: str, sha256: str = None, progress_callback=None, cancel_event: threading.Event = None) -> bool:
+        with zipfile.ZipFile(self.bundle, "r") as archive:
+            member = self._get_member(archive, file_path)
+            if member is None:
+                return False
+            hasher = hashlib.sha256()
+            copied = 0
+            with archive.open(member, "r") as source, open(destination + ".part", "wb") as f:
+                for chunk in iter(lambda: source.read(1048576), b""):
+                    if cancel_event is not None and cancel_event.is_set():
+                        break
+                    hasher.update(chunk)
+                    f.write(chunk)
+                    copied += len(chunk)
+                    if progress_callback is not None:
+                        progress_callback(copied, member.file_size)
+        if (cancel_event is not None and cancel_event.is_set()) or (sha256 is not None and hasher.hexdigest() != sha256.lower()):
+            os.remove(destination + ".part")
+            return False
+        os.replace(destination + ".part", destination)
+        return True
+
+    def open_archive(self, file_path: str) -> zipfile.ZipFile:
+        with zipfile.ZipFile(self.bundle, "r") as archive:
+            member = self._get_member(archive, file_path)
+            if member is None:
+                raise OSError(f"{file_path} is not in the bundle {self.bundle}")
+            temporary_file = tempfile.TemporaryFile()  # the nested archive has to be seekable
+            try:
+                with archive.open(member, "r") as source:
+                    shutil.copyfileobj(source, temporary_file, 1048576)
+                return _TemporaryZipFile(temporary_file)
+            except BaseException:
+                temporary_file.close()
+                raise
+
+
+client = UpdateClient()  # client used by the update functions
+
+default_update_source = "https://github.com/fastattackv/APY-launcher/raw/{branch}/Downloads/"
+update_source_location = default_update_source  # location of the update files, see set_update_source
+
+language_sections = ["WINDOW:\n", "HOME:\n", "APPS:\n", "ADD:\n", "UPDATES:\n", "OPTIONS:\n", "DIALOGS:\n"]  # titles of the sections of the lng files, in order
+_version_messages: dict[tuple[str, str], str] = {}  # messages of the versions already downloaded: {(branch, version): message}
+
+
+def set_update_source(location: str | None):
+    """Sets the location the update files are read from
+
+    :param location: url of a web folder, path of a local folder or path of a local .zip bundle, "{branch}" is replaced by the branch to update from. If None or "", GitHub is used
+    """
+    global update_source_location
+    update_source_location = location if location else default_update_source
+
+
+def get_update_source(branch: str) -> UpdateSource:
+    """Returns the source to read the update files of the given branch from
+
+    :param branch: branch to update from ("main" / "Development")
+    :return: update source corresponding to the location given to set_update_source
+    """
+    location = update_source_location.replace("{branch}", branch)
+    if location.startswith(("http://", "https://")):
+        return HTTPUpdateSource(location)
+    elif location.endswith(".zip"):
+        return ZipUpdateSource(location)
+    else:
+        return DirectoryUpdateSource(location)
+
+
+def _read_pe_resource_directory(f, offset: int) -> list[tuple[int, int]]:
+    """Returns the entries of the resource directory at the given offset of the file
+
+    :param f: binary file object of the executable
+    :param offset: offset in the file of the IMAGE_RESOURCE_DIRECTORY
+    :return: list of (name or id, offset to the data) of the entries, the high bit of the offset is set for the subdirectories
+    """
+    f.seek(offset + 12)
+    named_entries, id_entries = struct.unpack("<HH", f.read(4))
+    data = f.read(8 * (named_entries + id_entries))
+    return [struct.unpack_from("<II", data, i * 8) for i in range(len(data) // 8)]
+
+
+def read_pe_version(path: str) -> tuple[int, int, int, int] | None:
+    """Reads the file version of the given executable from its version resource (VS_FIXEDFILEINFO), without using the Windows API
+
+    :param path: path of the .exe / .dll file
+    :return: (major, minor, build, revision) or None if the file is not a PE file or does not contain any version resource
+    """
+    with open(path, "rb") as f:
+        # DOS header -> PE header
+        header = f.read(64)
+        if len(header) < 64 or header[0:2] != b"MZ":
+            return None
+        pe_offset = struct.unpack_from("<I", header, 0x3C)[0]
+        f.seek(pe_offset)
+        pe_header = f.read(24)
+        if len(pe_header) < 24 or pe_header[0:4] != b"PE\0\0":
+            return None
+        sections_count, optional_header_size = struct.unpack_from("<H12xH", pe_header, 6)
+        optional_header = f.read(optional_header_size)
+        if len(optional_header) < 2:
+            return None
+        magic = struct.unpack_from("<H", optional_header, 0)[0]
+        directories_offset = {0x10B: 96, 0x20B: 112}.get(magic)  # PE32 / PE32+
+        if directories_offset is None or len(optional_header) < directories_offset + 24:
+            return None
+        resources_rva, resources_size = struct.unpack_from("<II", optional_header, directories_offset + 16)  # resources = 3rd data directory
+        if resources_rva == 0:
+            return None
+
+        # sections, to convert the virtual addresses to offsets in the file
+        sections = []
+        sections_data = f.read(40 * sections_count)
+        for i in range(len(sections_data) // 40):
+            virtual_size, virtual_address, raw_size, raw_offset = struct.unpack_from("<IIII", sections_data, i * 40 + 8)
+            sections.append((virtual_address, max(virtual_size, raw_size), raw_offset))
+
+        def rva_to_offset(rva: int) -> int | None:
+            for virtual_address, size, raw_offset in sections:
+                if virtual_address <= rva < virtual_address + size:
+                    return rva - virtual_address + raw_offset
+            return None
+
+        resources_offset = rva_to_offset(resources_rva)
+        if resources_offset is None:
+            return None
+
+        # resources tree: type (RT_VERSION = 16) -> name -> language -> data
+        entry_offset = None
+        for entry_id, entry_offset in _read_pe_resource_directory(f, resources_offset):
+            if entry_id == 16 and entry_offset & 0x80000000:
+                break
+        else:
+            return None
+        for _ in range(2):
+            entries = _read_pe_resource_directory(f, resources_offset + (entry_offset & 0x7FFFFFFF))
+            if not entries:
+                return None
+            entry_offset = entries[0][1]
+        if entry_offset & 0x80000000:
+            return None
+        f.seek(resources_offset + entry_offset)
+        data_rva, data_size = struct.unpack("<II", f.read(8))
+        data_offset = rva_to_offset(data_rva)
+        if data_offset is None:
+            return None
+        f.seek(data_offset)
+        data = f.read(data_size)
+
+    # VS_VERSIONINFO -> VS_FIXEDFILEINFO, found with its signature
+    index = data.find(struct.pack("<I", 0xFEEF04BD))
+    if index == -1 or len(data) < index + 16:
+        return None
+    version_ms, version_ls = struct.unpack_from("<II", data, index + 8)
+    return version_ms >> 16, version_ms & 0xFFFF, version_ls >> 16, version_ls & 0xFFFF
+
+
+_file_versions_cache: dict[str, tuple[int, int, str]] = {}  # path: (mtime, size, version)
 
 
 def get_file_version(path: str) -> str:
-    """ Returns the version string of the given file """
-    information_parser = win32com.client.Dispatch("Scripting.FileSystemObject", pythoncom.CoInitialize())
-    version = information_parser.GetFileVersion(path)
-    if version.count(".") != 2:  # cutting to "x.x.x"
-        while version.count(".") < 2:
-            version += ".0"
-        while version.count(".") > 2:
-            version = ".".join(version.split(".")[0:-1])
+    """Returns the version string of the given file ("x.x.x"), the result is cached until the file is modified
+
+    :param path: path of the executable
+    :return: version of the file, "0.0.0" if the file does not contain any version
+    """
+    stat = os.stat(path)
+    cached = _file_versions_cache.get(path)
+    if cached is not None and cached[0:2] == (stat.st_mtime_ns, stat.st_size):
+        return cached[2]
+    version = read_pe_version(path)
+    version = "0.0.0" if version is None else ".".join(map(str, version[0:3]))  # cutting to "x.x.x"
+    _file_versions_cache[path] = (stat.st_mtime_ns, stat.st_size, version)
     return version
 
 
+_version_pattern = re.compile(r"v?(\d+)(?:\.(\d+))?(?:\.(\d+))?(?:-([0-9A-Za-z.-]+))?(?:\+[0-9A-Za-z.-]+)?")
+
+
+@functools.total_ordering
+class Version:
+    """ Version of an application ("2.1.0", "v2.1.0", "2.2.0-beta.1"), compared by numbers: "2.10.0" > "2.9.0" and a pre-release is older than its release """
+    __slots__ = ("major", "minor", "patch", "prerelease", "_key")
+
+    def __init__(self, major: int, minor=0, patch=0, prerelease: tuple[str, ...] = ()):
+        """
+        :param major: major number
+        :param minor: minor number
+        :param patch: patch number
+        :param prerelease: identifiers of the pre-release ("beta.1" -> ("beta", "1")), empty for a release
+        """
+        self.major = major
+        self.minor = minor
+        self.patch = patch
+        self.prerelease = prerelease
+        # numeric identifiers are compared as numbers and are older than the alphanumeric ones, a release is newer than its pre-releases
+        self._key = (major, minor, patch, not prerelease, tuple((0, int(identifier), "") if identifier.isdigit() else (1, 0, identifier) for identifier in prerelease))
+
+    def __eq__(self, other):
+        return isinstance(other, Version) and self._key == other._key
+
+    def __lt__(self, other):
+        if not isinstance(other, Version):
+            return NotImplemented
+        return self._key < other._key
+
+    def __hash__(self):
+        return hash(self._key)
+
+    def __str__(self):
+        return f"{self.major}.{self.minor}.{self.patch}" + (f"-{".".join(self.prerelease)}" if self.prerelease else "")
+
+    def __repr__(self):
+        return f"Version(\"{self}\")"
+
+
+@functools.lru_cache(maxsize=256)
+def parse_version(version: str) -> Version:
+    """Returns the Version corresponding to the given string, the results are cached
+
+    :param version: version string ("x.x.x", the missing numbers are 0, an optional "v" prefix, "-pre-release" and "+build" suffixes)
+    :return: parsed version
+    :raise ValueError: if the string is not a version
+    """
+    match = _version_pattern.fullmatch(version.strip())
+    if match is None:
+        raise ValueError(f"invalid version: \"{version}\"")
+    major, minor, patch, prerelease = match.groups()
+    return Version(int(major), int(minor or 0), int(patch or 0), tuple(prerelease.split(".")) if prerelease else ())
+
+
+def is_newer_version(version: str, than: str) -> bool:
+    """Returns True if the given version is newer than the other one
+
+    :param version: version to compare
+    :param than: version to compare to
+    :return: True if version > than, False if it is not or if one of them is not a version ("unknown" for example)
+    """
+    try:
+        return parse_version(version) > parse_version(than)
+    except ValueError:
+        return False
+
+
+class VersionsIndex:
+    """ Sorted versions of the Versions list.txt file, the versions between two versions are found with bisect """
+    def __init__(self, versions: list[str], branch: str = "main"):
+        """
+        :param versions: versions strings, the invalid ones and the empty ones are ignored
+        :param branch: branch the versions are from ("main" / "Development"), the pre-releases are only kept for the Development branch
+        """
+        parsed = {}
+        for text in versions:
+            text = text.strip()
+            try:
+                version = parse_version(text)
+            except ValueError:
+                continue
+            if not version.prerelease or branch == "Development":
+                parsed[version] = text
+        self.versions = sorted(parsed)
+        self._texts = [parsed[version] for version in self.versions]  # strings as written in the file (used in the names of the files)
+
+    def between(self, initial_version: str, current_version: str) -> list[str]:
+        """Returns the versions newer than initial_version and up to current_version (included), oldest first
+
+        :param initial_version: version before update
+        :param current_version: version after update
+        :return: versions strings as written in the list
+        """
+        start = bisect.bisect_right(self.versions, parse_version(initial_version))
+        end = bisect.bisect_right(self.versions, parse_version(current_version))
+        return self._texts[start:end]
+
+    def latest(self) -> str | None:
+        """ Returns the newest version of the list, None if the list is empty """
+        return self._texts[-1] if self._texts else None
+
+
 def check_versions(apps_list: list, branch: str) -> dict[str, str] | str:
     """Returns the version of the given applications
 
@@ -40,14 +660,14 @@ def check_versions(apps_list: list, branch: str) -> dict[str, str] | str:
         {"launcher": "v2.0.0", "sudoku": "unknown"} or "connexion error" if a connexion error occurred
     """
     try:
-        response = requests.get(f"https://github.com/fastattackv/APY-launcher/raw/{branch}/Downloads/Versions.txt")
+        response = get_update_source(branch).get_text("Versions.txt")
     except requests.ConnectionError:
         return "connexion error"
     except requests.Timeout:
         return "connexion error"
     else:
-        if response.status_code == 200:
-            git_versions_dict = {a.split("=")[0]: a.split("=")[1] for a in response.text.split("\n") if a != ""}
+        if response is not None:
+            git_versions_dict = {a.split("=")[0]: a.split("=")[1] for a in response.split("\n") if a != ""}
             versions_dict = {}
             for app in apps_list:
                 if app in git_versions_dict:
@@ -59,6 +679,87 @@ def check_versions(apps_list: list, branch: str) -> dict[str, str] | str:
             return "connexion error"
 
 
+class UpdateScheduler:
+    """ Checks the versions of the applications in a background thread at a regular interval, the last result is cached on disk to be shown instantly when the launcher starts """
+    def __init__(self, apps_list: list, get_branch, callback_func, interval=3600, ttl=900, jitter=300, cache_path="cache/last versions check.json"):
+        """
+        :param apps_list: list of the apps to retrieve the version of (see check_versions)
+        :param get_branch: function returning the branch to update from ("main" / "Development"), called before each check so that a change of branch is taken into account
+        :param callback_func: function called from the scheduler thread after each check with the result of check_versions
+        :param interval: number of seconds between two checks
+        :param ttl: number of seconds the cached result is considered up-to-date, no check is done at start if the cached result is younger
+        :param jitter: maximum number of seconds randomly added to the waiting time so that launchers started at the same time do not check at the same time (not added at start if the cached result expired)
+        :param cache_path: path of the file caching the last successful result
+        """
+        self.apps_list = apps_list
+        self.get_branch = get_branch
+        self.callback_func = callback_func
+        self.interval = interval
+        self.ttl = ttl
+        self.jitter = jitter
+        self.cache_path = cache_path
+        self._check_requested = threading.Event()
+        self._stop_requested = threading.Event()
+        self._thread = None
+
+    def get_cached_versions(self) -> dict[str, str] | None:
+        """ Returns the result of the last successful check, None if there is none for these apps and this branch """
+        cache = self._read_cache()
+        return cache["versions"] if cache is not None else None
+
+    def _read_cache(self) -> dict | None:
+        """ Returns the content of the cache file if it corresponds to these apps and this branch """
+        if not os.path.isfile(self.cache_path):
+            return None
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(cache, dict) or cache.get("branch") != self.get_branch() or not isinstance(cache.get("versions"), dict) or any(app not in cache["versions"] for app in self.apps_list):
+            return None
+        return cache
+
+    def check(self) -> dict[str, str] | str:
+        """ Checks the versions now (in the current thread), caches the result if the check succeeded and calls the callback function """
+        branch = self.get_branch()
+        versions = check_versions(self.apps_list, branch)
+        if versions != "connexion error" and os.path.isdir(os.path.dirname(self.cache_path) or "."):
+            with open(self.cache_path, "w", encoding="utf-8") as f:
+                json.dump({"branch": branch, "time": time.time(), "versions": versions}, f)
+        self.callback_func(versions)
+        return versions
+
+    def start(self):
+        """ Starts the background checks, the first check is done when the cached result expires (immediately if there is none) """
+        if self._thread is None or not self._thread.is_alive():
+            self._stop_requested.clear()
+            self._thread = threading.Thread(target=self._run, name="updater: checking updates", daemon=True)
+            self._thread.start()
+
+    def check_now(self):
+        """ Asks the background thread to check the versions now """
+        self._check_requested.set()
+
+    def stop(self):
+        """ Stops the background checks """
+        self._stop_requested.set()
+        self._check_requested.set()
+
+    def _run(self):
+        """ Loop of the background thread """
+        cache = self._read_cache()
+        remaining = self.ttl - (time.time() - cache.get("time", 0)) if cache is not None else 0
+        delay = remaining + random.uniform(0, self.jitter) if remaining > 0 else 0  # the expired result is replaced immediately
+        while True:
+            self._check_requested.wait(delay)
+            self._check_requested.clear()
+            if self._stop_requested.is_set():
+                break
+            self.check()
+            delay = self.interval + random.uniform(0, self.jitter)
+
+
 def check_for_launcher_message(branch: str) -> dict[int, str] | None:
     """Checks if there are messages available for the launcher
 
@@ -66,52 +767,70 @@ def check_for_launcher_message(branch: str) -> dict[int, str] | None:
     :return: dict containing the available messages ids and texts if there are messages, otherwise None
     """
     try:
-        messages = requests.get(f"https://github.com/fastattackv/APY-launcher/raw/{branch}/Downloads/Messages/Message.txt")
+        messages = get_update_source(branch).get_text("Messages/Message.txt")
     except requests.ConnectionError:
         return None
     except requests.Timeout:
         return None
     else:
-        if messages.status_code == 200:
-            messages = messages.text.split("&&")
+        if messages is not None:
+            messages = messages.split("&&")
             messages_dict = {int(message.split("\n", 1)[0]): message.split("\n", 1)[1].removesuffix("\n") for message in messages if message != ""}
             return messages_dict
         else:
             return None
 
 
-def check_for_version_message(initial_version: str, current_version: str, branch: str) -> str | None:
-    """Checks if there is a message available for the given version of the launcher
+def get_version_message(version: str, branch: str) -> str | None:
+    """Returns the message of the given version of the launcher, the messages already downloaded are kept in memory
+
+    :param version: version of the launcher to get the message of
+    :param branch: branch to update from ("main" / "Development")
+    :return: message of the version, None if the message could not be downloaded
+    """
+    if (branch, version) in _version_messages:
+        return _version_messages[(branch, version)]
+    try:
+        message = get_update_source(branch).get_text(f"Messages/{version}.txt")
+    except requests.ConnectionError:
+        return None
+    except requests.Timeout:
+        return None
+    if message is not None:
+        _version_messages[(branch, version)] = message
+    return message
+
+
+def check_for_version_message(initial_version: str, current_version: str, branch: str, max_workers=8) -> str | None:
+    """Checks if there is a message available for the given version of the launcher, the messages of the versions are downloaded concurrently
 
     :param initial_version: version the launcher was before update
     :param current_version: current version of the launcher
     :param branch: branch to update from ("main" / "Development")
-    :return: available message if there is one, otherwise None
+    :param max_workers: optional, maximum number of messages downloaded at the same time
+    :return: available messages (newest version first) if there is at least one, the messages that could not be downloaded are skipped, otherwise None
     """
     try:
-        versions_list = requests.get(f"https://github.com/fastattackv/APY-launcher/raw/{branch}/Downloads/Versions%20list.txt")
-        if versions_list.status_code == 200:
-            versions_list = versions_list.text.split("\n")
-            versions_to_check = [version for version in versions_list if initial_version < version <= current_version and version != ""]
-            if versions_to_check:
-                message = ""
-                for version in reversed(versions_to_check):
-                    response = requests.get(f"https://github.com/fastattackv/APY-launcher/raw/{branch}/Downloads/Messages/{version}.txt")
-                    if response.status_code == 200:
-                        message += response.text
-                        message += "\n\n"
-                    else:
-                        return None
-            else:
-                return None
-        else:
-            return None
+        versions_list = get_update_source(branch).get_text("Versions list.txt")
     except requests.ConnectionError:
         return None
     except requests.Timeout:
         return None
+    if versions_list is None:
+        return None
+    try:
+        versions_to_check = VersionsIndex(versions_list.split("\n"), branch).between(initial_version, current_version)
+    except ValueError:  # invalid initial / current version
+        return None
+    if not versions_to_check:
+        return None
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(versions_to_check)), thread_name_prefix="updates: downloading messages") as executor:
+        messages = list(executor.map(lambda version: get_version_message(version, branch), reversed(versions_to_check)))  # map keeps the order of the versions
+    messages = [message for message in messages if message is not None]
+    if messages:
+        return "".join(message + "\n\n" for message in messages)
     else:
-        return message
+        return None
 
 
 def update_updater(branch: str, callback_func):
@@ -129,17 +848,16 @@ def update_updater(branch: str, callback_func):
     elif versions["updater"] == "unknown":
         callback_func("error")
     else:
-        if get_file_version("APY! Launcher Updater.exe") < versions["updater"]:
+        if is_newer_version(versions["updater"], get_file_version("APY! Launcher Updater.exe")):
+            source = get_update_source(branch)
             try:
-                response = requests.get(f"https://github.com/fastattackv/APY-launcher/raw/{branch}/Downloads/APY!%20Launcher%20Updater.zip", timeout=(5, 10))
+                downloaded = source.download_file("APY! Launcher Updater.zip", "cache/APY! Launcher Updater.zip", source.get_digest("APY! Launcher Updater.zip"))
             except requests.ConnectionError:
                 callback_func("connexion error")
             except requests.Timeout:
                 callback_func("connexion error")
             else:
-                if response.status_code == 200:
-                    with open("cache/APY! Launcher Updater.zip", "wb") as f:
-                        f.write(response.content)
+                if downloaded:
                     with zipfile.ZipFile("cache/APY! Launcher Updater.zip", "r") as f:
                         f.extractall("cache")
                     os.remove("APY! Launcher Updater.exe")
@@ -151,3 +869,167 @@ def update_updater(branch: str, callback_func):
                     callback_func("error")
         else:
             callback_func("up-to-date")
+
+
+def is_lng_file_valid(path: str, separators_indexes: list[int] = None) -> bool:
+    """Verifies if the given lng file is valid: each section title is present once and the sections are in the right order
+
+    :param path: path of the file to verify
+    :param separators_indexes: optional, indexes of the lines of the section titles (WINDOW, HOME, APPS, ADD, UPDATES, OPTIONS, DIALOGS) for the current version of the launcher, if None only the order of the sections is checked
+    :return: True if the file is valid, else : False
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            lines = f.readlines()
+    except (OSError, UnicodeDecodeError):
+        return False
+    last_index = -1
+    for section_index, value in enumerate(language_sections):
+        if lines.count(value) != 1:
+            return False
+        index = lines.index(value)
+        if index <= last_index or (separators_indexes is not None and index != separators_indexes[section_index]):
+            return False
+        last_index = index
+    return True
+
+
+def download_language_files(languages: list[str], destination: str, branch: str, max_workers=4, cancel_event: threading.Event = None) -> bool:
+    """Downloads the given language files at the same time and verifies them. If one of the files could not be downloaded or is invalid, all the downloaded files are removed
+
+    :param languages: names of the language files to download ("english.lng"...)
+    :param destination: folder to write the files to
+    :param branch: branch to update from ("main" / "Development")
+    :param max_workers: optional, maximum number of files downloaded at the same time
+    :param cancel_event: optional, event stopping the downloads when it is set (the downloaded files are removed)
+    :return: True if all the files were downloaded and are valid, else: False
+    :raise requests.ConnectionError: if the connexion failed (the downloaded files are removed)
+    :raise requests.Timeout: if the server did not respond in time (the downloaded files are removed)
+    """
+    source = get_update_source(branch)
+
+    def download(file: str) -> bool:
+        target = os.path.join(destination, file)
+        return source.download_file(f"Languages/{file}", target, cancel_event=cancel_event) and is_lng_file_valid(target)
+
+    try:
+        if languages:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(languages)), thread_name_prefix="updates: downloading language files") as executor:
+                results = list(executor.map(download, languages))
+        else:
+            results = []
+    except BaseException:
+        _remove_files(destination, languages)
+        raise
+    if not all(results):
+        _remove_files(destination, languages)
+        return False
+    return True
+
+
+def _remove_files(folder: str, files: list[str]):
+    """ Removes the given files (and their partial downloads) from the given folder if they exist """
+    for file in files:
+        for file_path in (os.path.join(folder, file), os.path.join(folder, file) + ".part", os.path.join(folder, file) + ".part.etag"):
+            if os.path.isfile(file_path):
+                os.remove(file_path)
+
+
+def read_manifest(content: str) -> dict[str, tuple[str, int]]:
+    """Reads the given files manifest of a release. Each line of the manifest is: "sha256 size path", the paths are relative to the launcher folder and use "/"
+
+    :param content: content of the manifest
+    :return: dict containing the files of the release: {path: (sha256, size)}
+    """
+    manifest = {}
+    for line in content.split("\n"):
+        line = line.removesuffix("\r")
+        if line != "":
+            sha256, size, file_path = line.split(" ", 2)
+            manifest[file_path] = (sha256.lower(), int(size))
+    return manifest
+
+
+def get_file_sha256(path: str) -> str:
+    """ Returns the hexadecimal SHA-256 digest of the given file """
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1048576), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def create_manifest(launcher_folder: str) -> str:
+    """Creates the files manifest of the given launcher folder, to publish with a release as "APY! Launcher.manifest"
+
+    :param launcher_folder: folder containing the files of the release ("APY! Launcher" folder)
+    :return: content of the manifest
+    """
+    lines = []
+    for root, dirs, files in os.walk(launcher_folder):
+        dirs.sort()
+        for file in sorted(files):
+            full_path = os.path.join(root, file)
+            relative_path = os.path.relpath(full_path, launcher_folder).replace("\\", "/")
+            lines.append(f"{get_file_sha256(full_path)} {os.path.getsize(full_path)} {relative_path}\n")
+    return "".join(lines)
+
+
+def get_changed_files(manifest: dict[str, tuple[str, int]], launcher_folder: str) -> list[str]:
+    """Returns the files of the manifest that are missing or different in the given launcher folder, the files are only hashed if their size matches
+
+    :param manifest: manifest of the release to install
+    :param launcher_folder: folder of the installed launcher
+    :return: list of the paths (relative to the launcher folder) of the files to download
+    """
+    changed_files = []
+    for file_path, (sha256, size) in manifest.items():
+        installed_file = os.path.join(launcher_folder, file_path)
+        if not os.path.isfile(installed_file) or os.path.getsize(installed_file) != size or get_file_sha256(installed_file) != sha256:
+            changed_files.append(file_path)
+    return changed_files
+
+
+def download_delta(branch: str, launcher_folder: str, destination: str, cancel_event: threading.Event = None) -> dict[str, tuple[str, int]] | None:
+    """Downloads only the files of the latest release that are missing or different in the installed launcher. The files are read from the release archive without copying the whole archive (with HTTP Range requests for remote sources)
+
+    :param branch: branch to update from ("main" / "Development")
+    :param launcher_folder: folder of the installed launcher
+    :param destination: folder to write the downloaded files to (with the same tree as the launcher folder)
+    :param cancel_event: optional, event stopping the downloads when it is set (checked between the files), None is returned
+    :return: manifest of the release if the files were downloaded, None if the downloads were cancelled or if delta updates are not available (no manifest published, range requests not supported by the server, archive not matching the manifest...) and the whole archive has to be downloaded
+    :raise requests.ConnectionError: if the connexion failed
+    :raise requests.Timeout: if the server did not respond in time
+    """
+    source = get_update_source(branch)
+    manifest_content = source.get_text("APY! Launcher.manifest", cache=False)
+    if manifest_content is None:
+        return None
+    try:
+        manifest = read_manifest(manifest_content)
+    except ValueError:
+        return None
+    changed_files = get_changed_files(manifest, launcher_folder)
+    if not changed_files:
+        return manifest
+    try:
+        with source.open_archive("APY! Launcher.zip") as archive:
+            members = set(archive.namelist())
+            for file_path in changed_files:
+                if cancel_event is not None and cancel_event.is_set():
+                    return None
+                member = f"APY! Launcher/{file_path}"
+                if member not in members:
+                    return None
+                target = os.path.join(destination, file_path)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                hasher = hashlib.sha256()
+                with archive.open(member, "r") as member_file, open(target, "wb") as f:
+                    for chunk in iter(lambda: member_file.read(1048576), b""):
+                        hasher.update(chunk)
+                        f.write(chunk)
+                if hasher.hexdigest() != manifest[file_path][0]:  # archive and manifest do not match
+                    return None
+    except (OSError, zipfile.BadZipFile):
+        return None
+    return manifest
@@ -0,0 +1,869 @@
+"""
+This file contains the interpreter of the APY Update Language (AUL) used by the updater to update the launcher files
+
+Copyright (C) 2024  fastattack
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+See the license in the COPYING file or at <https://www.gnu.org/licenses/>.
+"""
+
+import os
+import re
+import shutil
+import csv
+import json
+import bisect
+import filecmp
+import zipfile
+import zlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+_argument = re.compile(r'(?:"[^"]*"|[^\s"])+')  # argument of a command, the parts in quotation marks can contain spaces
+_apps_types = ("game", "bonus", "config", "folder", "all")
+default_backup_folder = "cache/AUL backup"  # folder keeping the previous files while the update is not finished
+
+
+class AULError(Exception):
+    """ Error raised when an AUL command is invalid or cannot be executed """
+    def __init__(self, line_number: int, message: str):
+        self.line_number = line_number
+        super().__init__(f"AUL command {line_number}: {message}")
+
+
+def _is_in_path(path: str, parent: str) -> bool:
+    """ Returns True if the given path is the given parent or is contained in it (both paths should be normalized) """
+    return path == parent or path.startswith(parent.rstrip(os.sep) + os.sep)
+
+
+def tokenize_command(command: str) -> list[str]:
+    """Splits the given command into its arguments, the quotation marks are removed
+
+    :param command: AUL command
+    :return: list of the arguments, the first one is the name of the command
+    :raise ValueError: if a quotation mark is not closed
+    """
+    if command.count("\"") % 2:
+        raise ValueError("quotation mark not closed")
+    return [argument.replace("\"", "") for argument in _argument.findall(command)]
+
+
+def link_or_copy(src: str, dst: str) -> bool:
+    """Creates the file dst with the content of src: a hard link if the filesystem supports it (no data copied), else a copy
+
+    :param src: existing file
+    :param dst: file to create
+    :return: True if a hard link was created, False if the file was copied
+    """
+    try:
+        os.link(src, dst)
+        return True
+    except OSError:
+        shutil.copy2(src, dst)
+        return False
+
+
+def are_files_identical(file1: str, file2: str) -> bool:
+    """ Returns True if both files exist and have the same size and content """
+    return os.path.isfile(file1) and os.path.isfile(file2) and os.path.getsize(file1) == os.path.getsize(file2) and filecmp.cmp(file1, file2, shallow=False)
+
+
+def is_member_identical(member: zipfile.ZipInfo, path: str) -> bool:
+    """ Returns True if the given file exists and has the same size and CRC32 as the given member of an archive """
+    if not os.path.isfile(path) or os.path.getsize(path) != member.file_size:
+        return False
+    crc = 0
+    with open(path, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            crc = zlib.crc32(chunk, crc)
+    return crc == member.CRC
+
+
+def get_source_size(source: str | zipfile.ZipInfo) -> int:
+    """ Returns the size of the given file or member of an archive """
+    return source.file_size if isinstance(source, zipfile.ZipInfo) else os.path.getsize(source)
+
+
+class CopyStats:
+    """ Statistics of the files copied by copy_files """
+    def __init__(self):
+        self.files = 0  # number of files processed
+        self.linked = 0  # number of files created as hard links
+        self.copied = 0  # number of files copied
+        self.skipped = 0  # number of files that were already identical
+        self.bytes = 0  # size of the processed files
+        self.seconds = 0.0  # time spent processing the files
+
+    def throughput(self) -> float:
+        """ Returns the number of bytes processed per second """
+        return self.bytes / self.seconds if self.seconds else 0.0
+
+    def __str__(self):
+        return f"{self.files} files ({self.linked} linked, {self.copied} copied, {self.skipped} skipped), {self.bytes / 1e6:.1f} MB in {self.seconds:.2f} s ({self.throughput() / 1e6:.1f} MB/s)"
+
+
+def copy_files(files: list[tuple[str | zipfile.ZipInfo, str]], max_workers=8, progress_callback=None, stats: CopyStats = None, archive: zipfile.ZipFile = None, previous_files: dict[str, str] = None) -> CopyStats:
+    """Copies the given files at the same time, the destinations already identical to their source are skipped, the others are hard links when possible (see link_or_copy)
+
+    :param files: list of (source, destination), the source is a path or a member of the given archive (extracted directly to the destination), the parent directories of the destinations must exist
+    :param max_workers: maximum number of files copied at the same time
+    :param progress_callback: function called with the number of bytes processed so far each time a file is processed (from the copying threads)
+    :param stats: statistics to add the copied files to, a new one is created if None
+    :param archive: opened archive containing the sources that are members
+    :param previous_files: optional, destination: path of its current version (the destination is rebuilt elsewhere), the current versions identical to their source are hard-linked to the destination instead of being copied
+    :return: statistics of the copy
+    :raise OSError: if a file could not be copied (the other copies are finished before)
+    """
+    if stats is None:
+        stats = CopyStats()
+    lock = threading.Lock()
+    start = time.perf_counter()
+    start_bytes = stats.bytes
+
+    def copy(src: str | zipfile.ZipInfo, dst: str):
+        size = get_source_size(src)
+        previous = previous_files.get(dst) if previous_files is not None else None
+        if previous is not None and (is_member_identical(src, previous) if isinstance(src, zipfile.ZipInfo) else are_files_identical(src, previous)):
+            if os.path.lexists(dst):
+                os.remove(dst)
+            link_or_copy(previous, dst)
+            result = "skipped"
+        elif isinstance(src, zipfile.ZipInfo):
+            if is_member_identical(src, dst):
+                result = "skipped"
+            else:
+                with archive.open(src, "r") as fsrc, open(dst, "wb") as fdst:
+                    shutil.copyfileobj(fsrc, fdst, 1024 * 1024)
+                result = "copied"
+        elif are_files_identical(src, dst):
+            result = "skipped"
+        else:
+            if os.path.lexists(dst):
+                os.remove(dst)
+            result = "linked" if link_or_copy(src, dst) else "copied"
+        with lock:
+            stats.files += 1
+            stats.bytes += size
+            setattr(stats, result, getattr(stats, result) + 1)
+            if progress_callback is not None:
+                progress_callback(stats.bytes - start_bytes)
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for future in [executor.submit(copy, src, dst) for src, dst in files]:
+                future.result()
+    finally:
+        stats.seconds += time.perf_counter() - start
+    return stats
+
+
+def _remove(path: str):
+    """ Removes the given file or directory if it exists """
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path)
+    elif os.path.lexists(path):
+        os.remove(path)
+
+
+class AULTransaction:
+    """ Journal of the files modified by an AUL plan, the previous files are moved to a backup folder to be restored if the update fails or is interrupted """
+    def __init__(self, backup_folder: str):
+        """
+        :param backup_folder: folder to move the previous files to, must be on the same drive as the launcher (to only rename the files)
+        """
+        self.backup_folder = os.path.abspath(backup_folder)
+        self.journal_path = os.path.join(self.backup_folder, "journal.json")
+        self.entries: list[tuple[str, str | None]] = []  # (path, path of the backup or None if the path did not exist), in order
+
+    def begin(self):
+        """ Starts the transaction, a previous interrupted transaction is rolled back first """
+        self.recover(os.path.dirname(self.journal_path))
+        os.makedirs(self.backup_folder, exist_ok=True)
+        self.entries = []
+        self._write_journal()
+
+    def _write_journal(self):
+        """ Writes the journal, before the files are moved, to be able to roll back after an interruption """
+        with open(self.journal_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(self.entries, f)
+        os.replace(self.journal_path + ".tmp", self.journal_path)
+
+    def save(self, path: str):
+        """Moves the file / directory at the given path to the backup folder (or remembers that it did not exist), must be called before modifying the path. Nothing happens if the path or one of its parents was already saved
+
+        :param path: normalized absolute path
+        """
+        if any(_is_in_path(path, saved_path) for saved_path, backup in self.entries):
+            return
+        if os.path.lexists(path):
+            backup = os.path.join(self.backup_folder, str(len(self.entries)))
+            self.entries.append((path, backup))
+            self._write_journal()
+            os.replace(path, backup)
+        else:
+            self.entries.append((path, None))
+            self._write_journal()
+
+    def commit(self):
+        """ Ends the transaction and deletes the previous files """
+        os.remove(self.journal_path)
+        shutil.rmtree(self.backup_folder, ignore_errors=True)
+        self.entries = []
+
+    def rollback(self):
+        """ Restores the previous files and ends the transaction """
+        for path, backup in reversed(self.entries):
+            if backup is not None and not os.path.lexists(backup):  # interrupted before the file was moved: the path is still the previous file
+                continue
+            _remove(path)
+            if backup is not None:
+                os.replace(backup, path)
+        self.commit()
+
+    @classmethod
+    def recover(cls, backup_folder: str = default_backup_folder) -> bool:
+        """Rolls back the transaction interrupted in the given backup folder if there is one
+
+        :param backup_folder: backup folder of the interrupted transaction
+        :return: True if a transaction was rolled back
+        """
+        transaction = cls(backup_folder)
+        if not os.path.isfile(transaction.journal_path):
+            return False
+        with open(transaction.journal_path, "r", encoding="utf-8") as f:
+            transaction.entries = [tuple(entry) for entry in json.load(f)]
+        transaction.rollback()
+        return True
+
+
+class LineIndex:
+    """ Lines of a text file indexed by key (start of the line up to the first "="), to find the first line starting with a string without testing all the lines. The lines are kept as if the file was written and read again after each modification """
+    def __init__(self, lines: list[str]):
+        """
+        :param lines: lines of the file, modified by the methods of the index
+        """
+        self.lines = lines
+        self._positions: dict[str, list[int]] = {}  # key: sorted indexes of the lines with this key
+        self._keys: list[str] = []  # sorted keys, to find the keys starting with a string
+        self._valid = False  # built at the first search, then kept up to date by the modifications
+
+    @staticmethod
+    def get_key(line: str) -> str:
+        """ Returns the key of the given line: the start of the line up to the first "=" or the whole line if there is none """
+        return line.split("=", 1)[0] if "=" in line else line.removesuffix("\n")
+
+    def _build(self):
+        """ Indexes all the lines """
+        self._positions = {}
+        for index, line in enumerate(self.lines):
+            self._positions.setdefault(self.get_key(line), []).append(index)
+        self._keys = sorted(self._positions)
+        self._valid = True
+
+    def _add(self, index: int):
+        """ Adds the line at the given index to the index """
+        key = self.get_key(self.lines[index])
+        if key not in self._positions:
+            self._positions[key] = []
+            bisect.insort(self._keys, key)
+        bisect.insort(self._positions[key], index)
+
+    def _shift(self, start: int, offset: int):
+        """ Adds the given offset to the indexes greater than or equal to start, after a line was inserted / deleted """
+        for positions in self._positions.values():
+            for i in range(bisect.bisect_left(positions, start), len(positions)):
+                positions[i] += offset
+
+    def _remove(self, index: int):
+        """ Removes the line at the given index from the index """
+        key = self.get_key(self.lines[index])
+        self._positions[key].remove(index)
+        if not self._positions[key]:
+            del self._positions[key]
+            del self._keys[bisect.bisect_left(self._keys, key)]
+
+    def find(self, start: str) -> int | None:
+        """ Returns the index of the first line starting with the given string, None if there is none """
+        if not self._valid:
+            self._build()
+        if "=" in start:  # the key of the line is the start of the string
+            for index in self._positions.get(start.split("=", 1)[0], []):
+                if self.lines[index].startswith(start):
+                    return index
+            return None
+        first_index = None  # the lines starting with the string are the lines whose key starts with it
+        for i in range(bisect.bisect_left(self._keys, start), len(self._keys)):
+            if not self._keys[i].startswith(start):
+                break
+            if first_index is None or self._positions[self._keys[i]][0] < first_index:
+                first_index = self._positions[self._keys[i]][0]
+        return first_index
+
+    @staticmethod
+    def split_lines(text: str) -> list[str]:
+        """ Returns the lines of the given text like readlines: split after each line break """
+        lines = [line + "\n" for line in text.split("\n")]
+        lines[-1] = lines[-1].removesuffix("\n")
+        return lines if lines[-1] else lines[:-1]
+
+    def set(self, index: int, line: str):
+        """ Replaces the line at the given index, the line breaks of the new line split it in several lines """
+        line, *next_lines = self.split_lines(line) or [""]
+        if self._valid:
+            self._remove(index)
+        self.lines[index] = line
+        if self._valid:
+            self._add(index)
+        for i, next_line in enumerate(next_lines, index + 1):
+            self.insert(i, next_line)
+
+    def insert(self, index: int, line: str):
+        """ Inserts a line at the given index (at the end if the index is greater than the number of lines), a line inserted after a last line without line break continues it """
+        index = min(index, len(self.lines))
+        if not line:  # nothing is written
+            return
+        if index == len(self.lines) and self.lines and not self.lines[-1].endswith("\n"):
+            self.set(index - 1, self.lines[-1] + line)
+            return
+        self.lines.insert(index, line)
+        if self._valid:
+            self._shift(index, 1)  # the following lines moved
+            self._add(index)
+
+    def pop(self, index: int):
+        """ Deletes the line at the given index """
+        if self._valid:
+            self._remove(index)
+        self.lines.pop(index)
+        if self._valid:
+            self._shift(index + 1, -1)  # the following lines moved
+
+
+class AULCommand:
+    """ Validated command of an AUL plan """
+    def __init__(self, line_number: int, name: str, arguments: list[str], path: str, source: str | zipfile.ZipInfo | dict[str, str | zipfile.ZipInfo | None] = None, creates=False):
+        """
+        :param line_number: number of the command in the script (starting at 1)
+        :param name: name of the command
+        :param arguments: arguments of the command (without the name)
+        :param path: normalized absolute path of the file / directory modified by the command
+        :param source: new version for the replace commands, None if it was not downloaded (unchanged in a delta update):
+            replacefile: path of the new file or member of the archive
+            replacedir: dict of the content of the new directory, {relative path: path of the new file or member of the archive, None for the directories}
+        :param creates: True for the createfile / createdir commands if the path does not exist yet when the command is executed, the files brought by the previous replace commands included
+        """
+        self.line_number = line_number
+        self.name = name
+        self.arguments = arguments
+        self.path = path
+        self.source = source
+        self.creates = creates
+
+
+class AULPlan:
+    """ Validated list of commands returned by APYUpdateLanguageInterpreter.compile """
+    def __init__(self, commands: list[AULCommand]):
+        self.commands = commands
+
+    def estimate_bytes_to_copy(self) -> int:
+        """ Returns the number of bytes the replace commands will copy (dry run, no file is modified) """
+        total = 0
+        for command in self.commands:
+            if command.source is None:
+                continue
+            if command.name == "replacefile":
+                total += get_source_size(command.source)
+            elif command.name == "replacedir":
+                total += sum(get_source_size(source) for source in command.source.values() if source is not None)
+        return total
+
+    def collapse(self) -> "AULPlan":
+        """Returns the plan without the commands that have no effect on the final files, used when the scripts of several versions are executed one after the other:
+            - a replacefile / replacedir is removed if the same path or a parent directory is replaced later (the new files are the ones of the last version)
+            - a createfile / createdir of a path that does not exist is removed with the deletefile / deletedir of the same path if it is deleted later
+            - a create / delete command is removed if the same command was executed just before on the same path
+        Only the commands not separated by a command modifying the same path (or a parent / child path) are collapsed
+
+        :return: new plan
+        """
+        removed = set()
+        removed_count = -1
+        while removed_count != len(removed):  # a removed command can allow to remove a previous one
+            removed_count = len(removed)
+            for i, command in enumerate(self.commands):
+                if i in removed:
+                    continue
+                for j in range(i + 1, len(self.commands)):
+                    other = self.commands[j]
+                    if j in removed or not (_is_in_path(other.path, command.path) or _is_in_path(command.path, other.path)):
+                        continue
+                    if command.name in ("replacefile", "replacedir") and other.name in ("replacefile", "replacedir") and _is_in_path(command.path, other.path):  # replaced again later
+                        removed.add(i)
+                    elif command.creates and other.name in ("deletefile", "deletedir") and _is_in_path(command.path, other.path):  # created then deleted
+                        removed.add(i)
+                        if other.path == command.path and other.name == command.name.replace("create", "delete"):
+                            removed.add(j)
+                    elif command.name == other.name and command.path == other.path and command.name in ("createfile", "createdir", "deletefile", "deletedir"):  # does nothing the second time
+                        removed.add(j)
+                        continue
+                    break
+        return AULPlan([command for i, command in enumerate(self.commands) if i not in removed])
+
+
+class APYUpdateLanguageInterpreter:
+    """ Interpreter to execute the commands to update the launcher files using the APY Update Language. To work, the cwd should be set to the launcher folder and the new files should be in the given archive or unzipped in cache/APY! Launcher """
+    def __init__(self, manifest: dict[str, tuple[str, int]] = None, backup_folder: str = default_backup_folder, archive: zipfile.ZipFile = None, archive_root="APY! Launcher/"):
+        """
+        :param manifest: manifest of the release if only the changed files were downloaded (delta update), the files of the manifest missing from the cache are unchanged
+        :param backup_folder: folder keeping the previous files until the plan is executed (see AULTransaction)
+        :param archive: opened archive of the new version, the files are extracted directly to their destination instead of being copied from cache/APY! Launcher
+        :param archive_root: folder of the archive containing the launcher files
+        """
+        self.manifest = manifest
+        self._manifest_keys = {os.path.normcase(os.path.normpath(file_path)) for file_path in manifest} if manifest is not None else set()  # normalized paths of the manifest, the paths of the script and of the disk can have another case on Windows
+        self.archive = archive
+        self._archive_members: dict[str, tuple[str, zipfile.ZipInfo | None]] = {}  # normalized relative path: (relative path, member or None for the directories)
+        if archive is not None:
+            for member in archive.infolist():
+                if member.filename.startswith(archive_root) and member.filename != archive_root:
+                    relative_path = os.path.normpath(member.filename[len(archive_root):])
+                    self._archive_members[os.path.normcase(relative_path)] = (relative_path, None if member.is_dir() else member)
+                    parent = os.path.dirname(relative_path)
+                    while parent and os.path.normcase(parent) not in self._archive_members:  # directories without their own entry
+                        self._archive_members[os.path.normcase(parent)] = (parent, None)
+                        parent = os.path.dirname(parent)
+        self.transaction = AULTransaction(backup_folder)
+        self.copy_stats = CopyStats()  # files copied by the replace commands
+        self.max_workers = 8  # maximum number of files copied at the same time
+        self._progress_callback = None
+        self._copied_bytes = 0
+        self.commands = {
+            "replacefile": self.replacefile,
+            "replacedir": self.replacedir,
+            "createfile": self.createfile,
+            "createdir": self.createdir,
+            "deletefile": self.deletefile,
+            "deletedir": self.deletedir,
+            "update": self.update,
+            "updatecsv": self.updatecsv
+        }
+        # files modified by the update / updatecsv commands, read once and written once by flush
+        self._text_files: dict[str, LineIndex] = {}  # path: lines
+        self._csv_files: dict[str, list[list[str]]] = {}  # path: arguments of the updatecsv commands, applied row by row in one pass by flush
+
+    @staticmethod
+    def get_path(path: str) -> str:
+        """ Returns the normalized absolute path of the given path relative to the launcher folder """
+        return os.path.normcase(os.path.normpath(os.path.join(os.path.abspath(os.getcwd()), path)))
+
+    @staticmethod
+    def get_new_path(path: str) -> str:
+        """ Returns the normalized absolute path of the new version of the given path (in the unzipped launcher) """
+        return os.path.normcase(os.path.normpath(os.path.join(os.path.abspath(os.getcwd()), "cache/APY! Launcher", path)))
+
+    def get_new_file(self, path: str) -> str | zipfile.ZipInfo | None:
+        """Returns the new version of the given file
+
+        :param path: path of the file relative to the launcher folder
+        :return: member of the archive or path of the unzipped file, None if there is no new version
+        """
+        if self.archive is not None:
+            return self._archive_members.get(os.path.normcase(os.path.normpath(path)), ("", None))[1]
+        new_path = self.get_new_path(path)
+        return new_path if os.path.isfile(new_path) else None
+
+    def get_new_dir(self, path: str) -> dict[str, str | zipfile.ZipInfo | None] | None:
+        """Returns the content of the new version of the given directory
+
+        :param path: path of the directory relative to the launcher folder
+        :return: {path relative to the directory: member of the archive or path of the unzipped file, None for the directories}, None if there is no new version
+        """
+        if self.archive is not None:
+            prefix = os.path.normcase(os.path.normpath(path))
+            if prefix not in self._archive_members or self._archive_members[prefix][1] is not None:
+                return None
+            return {relative_path[len(prefix) + 1:]: member for key, (relative_path, member) in self._archive_members.items() if key.startswith(prefix + os.sep)}
+        new_path = self.get_new_path(path)
+        if not os.path.isdir(new_path):
+            return None
+        content = {}
+        for root, dirs, files in os.walk(new_path):
+            for directory in dirs:
+                content[os.path.relpath(os.path.join(root, directory), new_path)] = None
+            for file in files:
+                content[os.path.relpath(os.path.join(root, file), new_path)] = os.path.join(root, file)
+        return content
+
+    def compile(self, commands: list[str]) -> AULPlan:
+        """Tokenizes and validates the given commands without modifying any file: arguments, existence of the modified files and of the new files to copy
+
+        :param commands: lines of the AUL script(s), the empty lines are ignored
+        :return: validated plan to execute with run
+        :raise AULError: if a command is invalid
+        """
+        plan = []
+        # state of the files at this point of the plan, the paths not modified by the plan are checked on the disk
+        exists = {}  # path: True if it is a file / directory, False if it was deleted
+        trees = {}  # path of a replaced / created directory: paths of its whole content
+
+        def get_state(path: str) -> bool | None:
+            """ Returns True if the path exists at this point of the plan, False if it does not, None if the plan did not modify it """
+            if path in exists:
+                return exists[path]
+            parent, previous = os.path.dirname(path), path
+            while parent != previous:  # the nearest modified parent gives the state
+                if parent in trees:
+                    return path in trees[parent]
+                if exists.get(parent) is False:
+                    return False
+                parent, previous = os.path.dirname(parent), parent
+            return None
+
+        def is_file(path: str) -> bool:
+            state = get_state(path)
+            return os.path.isfile(path) if state is None else state
+
+        def is_dir(path: str) -> bool:
+            state = get_state(path)
+            return os.path.isdir(path) if state is None else state
+
+        def set_state(path: str, state: bool, content: set[str] = None):
+            """ Sets the state of the given path, the states of its content are replaced by the given content (replaced / created / deleted directory) """
+            if content is not None or not state:
+                for modified_path in [modified_path for modified_path in exists if _is_in_path(modified_path, path) and modified_path != path]:
+                    del exists[modified_path]
+                for modified_path in [modified_path for modified_path in trees if _is_in_path(modified_path, path)]:
+                    del trees[modified_path]
+            exists[path] = state
+            if content is not None:
+                trees[path] = content
+
+        for line_number, command in enumerate(commands, 1):
+            try:
+                arguments = tokenize_command(command)
+            except ValueError as e:
+                raise AULError(line_number, str(e))
+            if not arguments:  # empty line
+                continue
+            name, arguments = arguments[0], arguments[1:]
+            if name not in self.commands:
+                raise AULError(line_number, f"unknown command \"{name}\"")
+            if not arguments or len(arguments) != 1 and name not in ("update", "updatecsv"):
+                raise AULError(line_number, f"wrong number of arguments for {name}")
+            path = self.get_path(arguments[0])
+            source = None
+            creates = False
+
+            if name == "replacefile":
+                source = self.get_new_file(arguments[0])
+                if source is None and (self.manifest is None or os.path.normcase(os.path.normpath(arguments[0])) not in self._manifest_keys):  # else delta update: the file did not change
+                    raise AULError(line_number, f"the new version of the file \"{arguments[0]}\" was not found")
+                set_state(path, True)
+            elif name == "replacedir":
+                source = self.get_new_dir(arguments[0])
+                if not is_dir(path):
+                    raise AULError(line_number, f"the directory \"{arguments[0]}\" does not exist")
+                if source is None and self.manifest is None:  # else delta update: no file changed in the directory
+                    raise AULError(line_number, f"the new version of the directory \"{arguments[0]}\" was not found")
+                set_state(path, True, self._get_new_dir_content(path, source))
+            elif name in ("createfile", "createdir"):
+                if not is_dir(os.path.dirname(path)):
+                    raise AULError(line_number, f"the parent directory of \"{arguments[0]}\" does not exist")
+                creates = not (is_file(path) if name == "createfile" else is_dir(path))
+                if creates:
+                    set_state(path, True, set() if name == "createdir" else None)
+            elif name in ("deletefile", "deletedir"):
+                set_state(path, False)
+            elif name == "update":
+                self._check_update(line_number, arguments)
+                if not is_file(path):
+                    raise AULError(line_number, f"the file \"{arguments[0]}\" does not exist")
+            else:  # updatecsv
+                self._check_updatecsv(line_number, arguments)
+                if not is_file(path):
+                    raise AULError(line_number, f"the file \"{arguments[0]}\" does not exist")
+            plan.append(AULCommand(line_number, name, arguments, path, source, creates))
+        return AULPlan(plan)
+
+    def _get_new_dir_content(self, path: str, source: dict[str, str | zipfile.ZipInfo | None] | None) -> set[str]:
+        """Returns the content of the directory at the given path once it is replaced
+
+        :param path: normalized absolute path of the directory
+        :param source: new files of the directory (see get_new_dir)
+        :return: normalized absolute paths of the files and directories contained in the new directory
+        """
+        content = set()
+        new_paths = [os.path.normcase(os.path.join(path, relative_path)) for relative_path in source] if source is not None else []
+        if self.manifest is not None:  # delta update: the directory contains the files of the manifest, changed or not
+            new_paths.extend(self.get_path(key) for key in self._manifest_keys)
+        for new_path in new_paths:
+            while _is_in_path(new_path, path) and new_path != path and new_path not in content:  # with its parent directories
+                content.add(new_path)
+                new_path = os.path.dirname(new_path)
+        return content
+
+    @staticmethod
+    def _check_update(line_number: int, arguments: list[str]):
+        """ Raises an AULError if the given arguments of an update command are invalid """
+        if len(arguments) < 2:
+            raise AULError(line_number, "wrong number of arguments for update")
+        modifier = arguments[1]
+        if modifier == "newline" and len(arguments) == 3:
+            valid = arguments[2].isnumeric() or arguments[2] == "end"
+        elif modifier == "deleteline" and len(arguments) == 4:
+            valid = (arguments[2] == "index" and arguments[3].isnumeric()) or arguments[2] == "start"
+        elif modifier == "rewriteline" and len(arguments) == 5:
+            valid = (arguments[2] == "index" and (arguments[3].isnumeric() or arguments[3] == "end")) or arguments[2] == "start"
+        elif modifier == "modifyline" and len(arguments) == 7:
+            valid = ((arguments[2] == "index" and arguments[3].isnumeric()) or arguments[2] == "start") and arguments[5].isnumeric()
+        else:
+            raise AULError(line_number, f"unknown modifier or wrong number of arguments for update {modifier}")
+        if not valid:
+            raise AULError(line_number, f"invalid arguments for update {modifier}")
+
+    @staticmethod
+    def _check_updatecsv(line_number: int, arguments: list[str]):
+        """ Raises an AULError if the given arguments of an updatecsv command are invalid """
+        if not ((len(arguments) == 4 and arguments[2] in ["add", "delete"]) or (len(arguments) == 5 and arguments[2] == "modify")):
+            raise AULError(line_number, "wrong number of arguments for updatecsv")
+        if arguments[1] not in _apps_types:
+            raise AULError(line_number, f"unknown type of app \"{arguments[1]}\"")
+        if not (arguments[3].isnumeric() or arguments[3] == "end"):
+            raise AULError(line_number, f"invalid index \"{arguments[3]}\"")
+
+    def run(self, plan: AULPlan, progress_callback=None):
+        """Executes the given plan as a transaction, each file modified by the update / updatecsv commands is read once and written once at the end
+
+        :param plan: plan returned by compile
+        :param progress_callback: function called with (bytes copied, total bytes to copy) while the replace commands copy the files (from the copying threads)
+        :raise AULError: if a command failed, all the files are restored
+        """
+        if progress_callback is not None:
+            total = plan.estimate_bytes_to_copy()
+            self._progress_callback = lambda copied: progress_callback(copied, total)
+        self._copied_bytes = 0
+        self.transaction.begin()
+        command = None  # command being executed, None while the modified files are written
+        try:
+            for command in plan.commands:
+                if not self.commands[command.name](command):
+                    raise AULError(command.line_number, f"{command.name} failed")
+            command = None
+            self.flush()
+        except Exception as e:  # any error (file, archive, csv, encoding...) restores the files
+            self.discard()
+            self.transaction.rollback()
+            if isinstance(e, AULError):
+                raise
+            if command is None:
+                raise AULError(0, f"writing the updated files failed: {e}")
+            raise AULError(command.line_number, f"{command.name} failed: {e}")
+        self.transaction.commit()
+
+    def execute_all(self, commands: list[str]) -> bool:
+        """Compiles and executes the given commands
+
+        :param commands: lines of the AUL script(s)
+        :return: False if a command is invalid (no file is modified) or failed, True otherwise
+        """
+        try:
+            self.run(self.compile(commands))
+        except AULError:
+            return False
+        return True
+
+    def flush(self, path: str = None):
+        """Writes the files modified in memory by the update / updatecsv commands
+
+        :param path: if given, only writes the files at this path or contained in this directory (normalized path, see get_path)
+        """
+        # written to a new file replacing the previous one: the previous one can be a hard link to a backup
+        for file_path in [file_path for file_path in self._text_files if path is None or _is_in_path(file_path, path)]:
+            self.transaction.save(file_path + ".tmp")
+            with open(file_path + ".tmp", "w", encoding="utf-8") as f:
+                f.writelines(self._text_files.pop(file_path).lines)
+            self.transaction.save(file_path)
+            os.replace(file_path + ".tmp", file_path)
+        for file_path in [file_path for file_path in self._csv_files if path is None or _is_in_path(file_path, path)]:
+            transforms = self._csv_files.pop(file_path)
+            self.transaction.save(file_path + ".tmp")
+            with open(file_path, "r", encoding="utf-8", newline="") as f_src, open(file_path + ".tmp", "w", encoding="utf-8", newline="") as f_dst:
+                writer = csv.writer(f_dst, delimiter=",", quotechar='"')
+                for row in csv.reader(f_src, delimiter=",", quotechar='"', doublequote=True):  # only one row in memory
+                    for arguments in transforms:
+                        self._transform_row(row, arguments)
+                    writer.writerow(row)
+            self.transaction.save(file_path)
+            os.replace(file_path + ".tmp", file_path)
+
+    def discard(self, path: str = None):
+        """Forgets the modifications kept in memory, used when the files are replaced or deleted
+
+        :param path: if given, only forgets the files at this path or contained in this directory (normalized path, see get_path)
+        """
+        for files in (self._text_files, self._csv_files):
+            for file_path in [file_path for file_path in files if path is None or _is_in_path(file_path, path)]:
+                del files[file_path]
+
+    def _get_text_file(self, path: str) -> LineIndex:
+        """ Returns the lines of the given text file, read only the first time """
+        if path not in self._text_files:
+            self.flush(path)  # the file may have been modified as a csv file
+            with open(path, "r", encoding="utf-8") as f:
+                self._text_files[path] = LineIndex(f.readlines())
+        return self._text_files[path]
+
+    def _get_csv_transforms(self, path: str) -> list[list[str]]:
+        """ Returns the list of the updatecsv commands waiting to be applied to the given csv file """
+        if path not in self._csv_files:
+            self.flush(path)  # the file may have been modified as a text file
+            self._csv_files[path] = []
+        return self._csv_files[path]
+
+    def _copy_files(self, files: list[tuple[str | zipfile.ZipInfo, str]], previous_files: dict[str, str] = None):
+        """ Copies the given files with copy_files, adds them to the statistics and reports the progress """
+        def progress(copied: int):
+            if self._progress_callback is not None:
+                self._progress_callback(self._copied_bytes + copied)
+
+        bytes_before = self.copy_stats.bytes
+        copy_files(files, self.max_workers, progress, self.copy_stats, self.archive, previous_files)
+        self._copied_bytes += self.copy_stats.bytes - bytes_before
+
+    def replacefile(self, command: AULCommand) -> bool:
+        if command.source is not None:  # else delta update: the file did not change
+            self.discard(command.path)
+            if is_member_identical(command.source, command.path) if isinstance(command.source, zipfile.ZipInfo) else are_files_identical(command.source, command.path):  # already up-to-date
+                self._copy_files([(command.source, command.path)])  # only counted as skipped
+                return True
+            staging_path = command.path + ".new"
+            self.transaction.save(staging_path)  # removed if the update is interrupted
+            _remove(staging_path)
+            self._copy_files([(command.source, staging_path)])
+            self.transaction.save(command.path)
+            os.replace(staging_path, command.path)
+        return True
+
+    def replacedir(self, command: AULCommand) -> bool:
+        """ Builds the new directory next to the previous one and swaps them, the previous one is kept in the backup folder """
+        launcher_folder = os.path.abspath(os.getcwd())
+        self.flush(command.path)  # the unchanged files keep their modifications
+        staging_path = command.path + ".new"
+        self.transaction.save(staging_path)  # removed if the update is interrupted
+        _remove(staging_path)
+        os.mkdir(staging_path)
+
+        files_to_copy = {}  # relative path: source
+        previous_files = {}  # destination: file of the previous directory, reused if it is identical to the new file
+        if self.manifest is not None:  # delta update: the unchanged files are taken from the previous directory
+            for root, dirs, files in os.walk(command.path):
+                for file in files:
+                    full_path = os.path.join(root, file)
+                    if os.path.normcase(os.path.relpath(full_path, launcher_folder)) in self._manifest_keys:
+                        files_to_copy[os.path.relpath(full_path, command.path)] = full_path
+        if command.source is not None:  # new files
+            for relative_path, source in command.source.items():
+                if source is None:
+                    os.makedirs(os.path.join(staging_path, relative_path), exist_ok=True)
+                else:
+                    files_to_copy[relative_path] = source
+                    previous_files[os.path.join(staging_path, relative_path)] = os.path.join(command.path, relative_path)
+        for relative_path in files_to_copy:
+            os.makedirs(os.path.dirname(os.path.join(staging_path, relative_path)), exist_ok=True)
+        self._copy_files([(source, os.path.join(staging_path, relative_path)) for relative_path, source in files_to_copy.items()], previous_files)
+
+        self.transaction.save(command.path)
+        _remove(command.path)  # still there if a parent directory was already replaced
+        os.replace(staging_path, command.path)
+        return True
+
+    def createfile(self, command: AULCommand) -> bool:
+        if not (command.path in self._text_files or command.path in self._csv_files or os.path.isfile(command.path)):
+            self.transaction.save(command.path)
+            with open(command.path, "x"):
+                pass
+        return True
+
+    def createdir(self, command: AULCommand) -> bool:
+        if not os.path.isdir(command.path):
+            self.transaction.save(command.path)
+            os.mkdir(command.path)
+        return True
+
+    def deletefile(self, command: AULCommand) -> bool:
+        self.discard(command.path)
+        if os.path.isfile(command.path):
+            self.transaction.save(command.path)  # moved to the backup folder
+            _remove(command.path)  # still there if a parent directory was already replaced
+        return True
+
+    def deletedir(self, command: AULCommand) -> bool:
+        self.discard(command.path)
+        if os.path.isdir(command.path):
+            self.transaction.save(command.path)  # moved to the backup folder
+            _remove(command.path)  # still there if a parent directory was already replaced
+        return True
+
+    def update(self, command: AULCommand) -> bool:
+        arguments = command.arguments
+        content = self._get_text_file(command.path)
+        lines = content.lines
+
+        if arguments[1] == "newline":
+            index = int(arguments[2]) if arguments[2].isnumeric() else len(lines)
+            content.insert(index, "\n")
+
+        elif arguments[1] == "deleteline":
+            index = int(arguments[3]) if arguments[2] == "index" else content.find(arguments[3])
+            if index is None:
+                return False
+            content.pop(index)
+
+        elif arguments[1] == "rewriteline":
+            if arguments[2] == "index" and arguments[3].isnumeric():
+                index = int(arguments[3])
+            elif arguments[2] == "index" and arguments[3] == "end":
+                index = len(lines) - 1
+            else:  # start
+                index = content.find(arguments[3])
+                if index is None:
+                    return False
+            if arguments[3] == "end" and lines[index] != "\n" and lines[index].endswith("\n"):
+                content.insert(len(lines), arguments[4])
+            else:
+                content.set(index, arguments[4] + "\n")
+
+        else:  # modifyline
+            splitter_char = arguments[4]
+            index = int(arguments[3]) if arguments[2] == "index" else content.find(arguments[3])
+            if index is None:
+                return False
+            line = lines[index].split(splitter_char)
+            line[int(arguments[5])] = arguments[6]
+            content.set(index, splitter_char.join(line) + "\n")
+        return True
+
+    def updatecsv(self, command: AULCommand) -> bool:
+        """ The commands on the same file are applied together by flush, in one pass over the file """
+        self._get_csv_transforms(command.path).append(command.arguments)
+        return True
+
+    @staticmethod
+    def _transform_row(line: list[str], arguments: list[str]):
+        """ Applies the updatecsv command with the given arguments to the given row of the csv file """
+        if line[1] == arguments[1] or arguments[1] == "all":
+            if arguments[2] == "add":
+                index = int(arguments[3]) if arguments[3].isnumeric() else len(line)
+                line.insert(index, "")
+            elif arguments[2] == "delete":
+                index = int(arguments[3]) if arguments[3].isnumeric() else len(line) - 1
+                line.pop(index)
+            else:  # modify
+                index = int(arguments[3]) if arguments[3].isnumeric() else len(line) - 1
+                line[index] = arguments[4]
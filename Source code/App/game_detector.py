@@ -12,7 +12,24 @@ See the license in the COPYING file or at <https://www.gnu.org/licenses/>.
 """
 
 import os
+import json
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator
 import win32com.client
+import pythoncom
+
+import store_detectors as sd
+
+
+_scan_manifest_path = "cache/folders scan.json"
+_installed_games_cache_path = "cache/installed games.json"
+default_steam_paths = ["C:/Program Files (x86)/Steam", "C:/Program Files/Steam"]  # installation folders of steam to read the libraries of
+default_epic_manifests_paths = ["C:/ProgramData/Epic/EpicGamesLauncher/Data/Manifests"]  # folders containing the epic games .item manifests
+_vdf_token = re.compile(r'"((?:[^"\\]|\\.)*)"|([{}])')
+_vdf_escape = re.compile(r"\\(.)")
+_thread_data = threading.local()  # COM objects of each thread classifying files
 
 
 def detect_name(path: str) -> str:
@@ -27,42 +44,387 @@ def detect_name(path: str) -> str:
     return name
 
 
-def detect_games_in_folder(path: str, check_recursively=False, _lastdir="") -> list | str:
+def _scan_directory(directory: tuple[str, str]) -> tuple[list[tuple[str, os.DirEntry]], list[tuple[str, str]]]:
+    """Lists the content of a single directory using os.scandir
+
+    :param directory: tuple containing the absolute path of the directory to scan and its relative path (to the scanned folder)
+    :return: tuple containing the list of the files found (relative path, DirEntry) and the list of the subdirectories found (absolute path, relative path)
+    """
+    path, relative_path = directory
+    files = []
+    subdirectories = []
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_file():  # uses the type cached by scandir, no extra stat on Windows
+                        files.append((os.path.join(relative_path, entry.name), entry))
+                    elif entry.is_dir(follow_symlinks=False):
+                        subdirectories.append((entry.path, os.path.join(relative_path, entry.name)))
+                except OSError:  # broken entry
+                    continue
+    except OSError:  # access denied, directory removed while scanning...
+        pass
+    return files, subdirectories
+
+
+def iter_folder_files(path: str, check_recursively=False, max_depth=16, max_files=100000, max_workers=8, cancel_event: threading.Event = None) -> Iterator[tuple[str, os.DirEntry]]:
+    """Yields the files in a given folder as soon as their directory is scanned, the subdirectories of a same depth are scanned in parallel
+
+    :param path: path of the directory to scan
+    :param check_recursively: optional, if set to True, the function will also list the files in subdirectories
+    :param max_depth: optional, maximum depth of subdirectories to scan when check_recursively is set to True
+    :param max_files: optional, maximum number of files to list, the scan stops when it is reached
+    :param max_workers: optional, number of threads used to scan the subdirectories
+    :param cancel_event: optional, event to set to stop the scan
+    :return: iterator of the found files: (relative path to the given folder, DirEntry)
+    """
+    files_count = 0
+    directories = [(path, "")]
+    depth = 0
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="game detector: scanning")
+    try:
+        while directories:
+            subdirectories = []
+            for directory_files, directory_subdirectories in executor.map(_scan_directory, directories):
+                for file in directory_files:
+                    if files_count >= max_files or (cancel_event is not None and cancel_event.is_set()):
+                        return
+                    files_count += 1
+                    yield file
+                subdirectories.extend(directory_subdirectories)
+            if not check_recursively or depth >= max_depth:
+                return
+            directories = subdirectories
+            depth += 1
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def scan_folder(path: str, check_recursively=False, max_depth=16, max_files=100000, max_workers=8) -> list[tuple[str, os.DirEntry]]:
+    """Lists the files in a given folder, the subdirectories of a same depth are scanned in parallel
+
+    :param path: path of the directory to scan
+    :param check_recursively: optional, if set to True, the function will also list the files in subdirectories
+    :param max_depth: optional, maximum depth of subdirectories to scan when check_recursively is set to True
+    :param max_files: optional, maximum number of files to list, the scan stops when it is reached
+    :param max_workers: optional, number of threads used to scan the subdirectories
+    :return: list of the found files: (relative path to the given folder, DirEntry)
+    """
+    return list(iter_folder_files(path, check_recursively, max_depth, max_files, max_workers))
+
+
+def _get_shell():
+    """ Returns the WScript.Shell object of the current thread, COM is initialized the first time it is called in a thread """
+    if not hasattr(_thread_data, "shell"):
+        pythoncom.CoInitialize()  # once per thread
+        _thread_data.shell = win32com.client.Dispatch("WScript.Shell")
+    return _thread_data.shell
+
+
+def classify_file(path: str, name: str) -> str:
+    """Returns the type of the given file if it is a game
+
+    :param path: absolute path of the file
+    :param name: name of the file
+    :return: type of the file ("exe" / "lnk" / "unknown" or the name of the store of a .url file: "steam" / "epic" / "uplay"...), "lnk" is returned for shortcuts to a .exe
+    """
+    if name.endswith(".url"):
+        store = sd.detect_store_of_file(path)
+        return store if store is not None else "unknown"
+    elif name.endswith(".lnk"):
+        shortcut = _get_shell().CreateShortCut(path)
+        target_path = shortcut.Targetpath
+        if os.path.isfile(target_path) and target_path.endswith(".exe"):
+            return "lnk"
+        return "unknown"
+    elif name.endswith(".exe"):
+        return "exe"
+    else:
+        return "unknown"
+
+
+def _load_json_cache(path: str) -> dict:
+    """Loads the given json cache file
+
+    :param path: path of the cache file
+    :return: content of the cache, empty if the file does not exist or is corrupted
+    """
+    if os.path.isfile(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                content = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if isinstance(content, dict):
+            return content
+    return {}
+
+
+def _save_json_cache(content: dict, path: str):
+    """Saves the given content to the given json cache file, the parent folder is created if needed
+
+    :param content: content of the cache
+    :param path: path of the cache file
+    """
+    if os.path.dirname(path) != "":
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(content, f)
+
+
+def load_scan_manifest(path=_scan_manifest_path) -> dict[str, dict[str, list]]:
+    """Loads the manifest of the previous folder scans
+
+    :param path: optional, path of the manifest file
+    :return: dict containing for each scanned directory its files: {directory: {name: [mtime, size, type]}}, empty if the manifest does not exist or is corrupted
+    """
+    return _load_json_cache(path)
+
+
+def save_scan_manifest(manifest: dict[str, dict[str, list]], path=_scan_manifest_path):
+    """Saves the given manifest of the folder scans
+
+    :param manifest: manifest to save
+    :param path: optional, path of the manifest file
+    """
+    _save_json_cache(manifest, path)
+
+
+def split_file_type(file_type: str) -> tuple[str, str | None]:
+    """Splits the type returned by classify_file into the kind of the file and its store
+
+    :param file_type: type of the file returned by classify_file
+    :return: tuple containing the kind of the file ("url" / "exe" / "lnk" / "unknown") and its store (name of the store or None)
+    """
+    if file_type in sd.stores:
+        return "url", file_type
+    else:
+        return file_type, None
+
+
+def iter_rescan_folder(path: str, manifest: dict[str, dict[str, list]], cancel_event: threading.Event = None) -> Iterator[tuple[str, str, bool]]:
+    """Yields the files of the given folder with their type as soon as they are classified, only the files that are new or modified since the last scan stored in the manifest are classified
+
+    :param path: path of the directory to scan, must exist
+    :param manifest: manifest of the previous scans, it is updated with the result of this scan (when the scan is cancelled, only the yielded files are updated)
+    :param cancel_event: optional, event to set to stop the scan
+    :return: iterator of the files of the folder: (name, type, True if the file is new or modified since the last scan)
+    """
+    key = os.path.normcase(os.path.abspath(path))
+    previous_files = manifest.get(key, {})
+    files = {}
+    for relative_path, entry in iter_folder_files(path, cancel_event=cancel_event):
+        try:
+            stat = entry.stat()  # cached by scandir on Windows
+        except OSError:
+            continue
+        previous = previous_files.get(entry.name)
+        if previous is not None and previous[0] == stat.st_mtime_ns and previous[1] == stat.st_size:
+            files[entry.name] = previous
+            changed = False
+        else:
+            try:
+                file_type = classify_file(entry.path, entry.name)
+            except (OSError, UnicodeDecodeError):
+                file_type = "unknown"
+            files[entry.name] = [stat.st_mtime_ns, stat.st_size, file_type]
+            changed = True
+        yield entry.name, files[entry.name][2], changed
+    if cancel_event is not None and cancel_event.is_set():  # keeps the previous infos of the files not scanned
+        manifest[key] = previous_files | files
+    else:
+        manifest[key] = files
+
+
+def rescan_folder(path: str, manifest: dict[str, dict[str, list]]) -> tuple[list[tuple[str, str]], list[str]]:
+    """Scans the files of the given folder, only the files that are new or modified since the last scan stored in the manifest are classified
+
+    :param path: path of the directory to scan, must exist
+    :param manifest: manifest of the previous scans, it is updated with the result of this scan
+    :return: tuple containing the list of the files of the folder with their type: [(name, type)] and the list of the names of the files that are new or modified since the last scan
+    """
+    files = []
+    changed_files = []
+    for name, file_type, changed in iter_rescan_folder(path, manifest):
+        files.append((name, file_type))
+        if changed:
+            changed_files.append(name)
+    return files, changed_files
+
+
+def iter_games_in_folder(path: str, check_recursively=False, max_depth=16, max_files=100000, cancel_event: threading.Event = None) -> Iterator[tuple[str, str, str | None]]:
+    """Yields the games in a given folder as soon as they are detected
+
+    :param path: path of the directory to check
+    :param check_recursively: optional, if set to True, the function will also search games in subdirectories
+    :param max_depth: optional, maximum depth of subdirectories to check when check_recursively is set to True
+    :param max_files: optional, maximum number of files to check
+    :param cancel_event: optional, event to set to stop the detection
+    :return: iterator of the detected games: (relative path to the given folder, kind ("url" / "exe" / "lnk"), store (name of the store or None))
+    :raise NotADirectoryError: if the given path is not a directory
+    """
+    if not os.path.isdir(path):
+        raise NotADirectoryError(f"The given path is not a directory: {path}")
+    for relative_path, entry in iter_folder_files(path, check_recursively, max_depth, max_files, cancel_event=cancel_event):
+        try:
+            file_type = classify_file(entry.path, entry.name)
+        except (OSError, UnicodeDecodeError):
+            continue
+        if file_type != "unknown":
+            yield relative_path, *split_file_type(file_type)
+
+
+def detect_games_in_folder(path: str, check_recursively=False, max_depth=16, max_files=100000) -> list | str:
     """Detects the games in a given folder
 
     :param path: path of the directory to check
     :param check_recursively: optional, if set to True, the function will also search games in subdirectories
-    :param _lastdir: DO NOT CHANGE THIS VARIABLE MANUALLY, contains the relative path to add before the games names
+    :param max_depth: optional, maximum depth of subdirectories to check when check_recursively is set to True
+    :param max_files: optional, maximum number of files to check
     :return: list of the detected games relative paths (to the given folder) or "invalid path" if path doesn't exist
     """
     if os.path.isdir(path):
-        games = []
-        for item in os.listdir(path):
-            if os.path.isfile(os.path.join(path, item)):  # file
-                if item.endswith(".url"):
-                    with open(os.path.join(path, item), "r") as f:
-                        lines = f.readlines()
-                        for line in lines:
-                            if line.startswith("URL=steam://rungameid/"):  # steam game
-                                games.append(os.path.join(_lastdir, item))
-                                break
-                            elif line.startswith("URL=com.epicgames.launcher://apps/"):  # epicgames game
-                                games.append(os.path.join(_lastdir, item))
-                                break
-                            elif line.startswith("URL=uplay://launch/"):  # uplay game
-                                games.append(os.path.join(_lastdir, item))
-                                break
-                elif item.endswith(".lnk"):
-                    shell = win32com.client.Dispatch("WScript.Shell")
-                    shortcut = shell.CreateShortCut(os.path.join(path, item))
-                    target_path = shortcut.Targetpath
-                    if target_path.endswith(".exe"):
-                        games.append(os.path.join(_lastdir, item))
-                elif item.endswith(".exe"):
-                    games.append(os.path.join(_lastdir, item))
-            else:  # folder
-                if check_recursively:
-                    games.extend(detect_games_in_folder(os.path.join(path, item), True, os.path.join(_lastdir, item)))
-        return games
+        return [relative_path for relative_path, kind, store in iter_games_in_folder(path, check_recursively, max_depth, max_files)]
     else:
         return "invalid path"
+
+
+def parse_vdf(content: str) -> dict:
+    """Parses the given Valve KeyValues (.vdf / .acf) content
+
+    :param content: content to parse
+    :return: dict containing the parsed keys, sub-sections are parsed as dicts
+    """
+    root = {}
+    stack = [root]
+    key = None
+    for match in _vdf_token.finditer(content):
+        string, brace = match.groups()
+        if brace == "{":
+            section = {}
+            if key is not None:
+                stack[-1][key] = section
+                key = None
+            stack.append(section)
+        elif brace == "}":
+            if len(stack) > 1:
+                stack.pop()
+            key = None
+        elif key is None:
+            key = _vdf_escape.sub(r"\1", string)
+        else:
+            stack[-1][key] = _vdf_escape.sub(r"\1", string)
+            key = None
+    return root
+
+
+def _read_steam_app_manifest(path: str) -> dict[str, str] | None:
+    """Reads the given steam appmanifest_*.acf file
+
+    :param path: path of the manifest
+    :return: dict containing the infos of the game ("name", "store", "url", "path") or None if the manifest is invalid
+    """
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        app_state = parse_vdf(f.read()).get("AppState")
+    if not isinstance(app_state, dict) or "appid" not in app_state or "name" not in app_state:
+        return None
+    return {
+        "name": app_state["name"],
+        "store": "steam",
+        "url": f"steam://rungameid/{app_state["appid"]}",
+        "path": os.path.join(os.path.dirname(path), "common", app_state["installdir"]) if "installdir" in app_state else ""
+    }
+
+
+def _read_epic_manifest(path: str) -> dict[str, str] | None:
+    """Reads the given epic games .item manifest
+
+    :param path: path of the manifest
+    :return: dict containing the infos of the game ("name", "store", "url", "path") or None if the manifest is invalid
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if not isinstance(manifest, dict) or "DisplayName" not in manifest or "AppName" not in manifest:
+        return None
+    return {
+        "name": manifest["DisplayName"],
+        "store": "epic",
+        "url": f"com.epicgames.launcher://apps/{manifest.get("CatalogNamespace", "")}%3A{manifest.get("CatalogItemId", "")}%3A{manifest["AppName"]}?action=launch&silent=true",
+        "path": manifest.get("InstallLocation", "")
+    }
+
+
+def _get_steam_libraries(steam_path: str) -> list[str]:
+    """Returns the steamapps folders of the libraries of the given steam installation
+
+    :param steam_path: installation folder of steam
+    :return: list of the steamapps folders
+    """
+    libraries = [os.path.join(steam_path, "steamapps")]
+    library_folders = os.path.join(steam_path, "steamapps", "libraryfolders.vdf")
+    if os.path.isfile(library_folders):
+        try:
+            with open(library_folders, "r", encoding="utf-8", errors="replace") as f:
+                folders = parse_vdf(f.read()).get("libraryfolders", {})
+        except OSError:
+            folders = {}
+        for key, folder in folders.items():
+            if not key.isdigit():  # not a library ("contentstatsid"...)
+                continue
+            if isinstance(folder, dict):  # new format: {"path": "...", "label": "...", "apps": {...}...}
+                folder = folder.get("path")
+            if isinstance(folder, str) and folder != "":  # old format: the value is the path
+                library = os.path.join(folder, "steamapps")
+                if os.path.normcase(os.path.abspath(library)) not in [os.path.normcase(os.path.abspath(a)) for a in libraries]:
+                    libraries.append(library)
+    return libraries
+
+
+def detect_installed_games(steam_paths: list[str] = None, epic_manifests_paths: list[str] = None, cache_path=_installed_games_cache_path) -> list[dict[str, str]]:
+    """Detects the games installed on the system by reading the library manifests of the stores (steam appmanifest_*.acf files and epic games .item files).
+    The manifests that did not change since the last detection are not parsed again
+
+    :param steam_paths: optional, installation folders of steam, default_steam_paths by default
+    :param epic_manifests_paths: optional, folders containing the epic games manifests, default_epic_manifests_paths by default
+    :param cache_path: optional, path of the file caching the parsed manifests, None to not use a cache
+    :return: list of the detected games: [{"name": name of the game, "store": "steam" / "epic", "url": url to launch the game, "path": installation folder}]
+    """
+    if steam_paths is None:
+        steam_paths = default_steam_paths
+    if epic_manifests_paths is None:
+        epic_manifests_paths = default_epic_manifests_paths
+    previous_cache = _load_json_cache(cache_path) if cache_path is not None else {}
+    cache = {}
+
+    manifests = []  # (path, DirEntry, reader)
+    for steam_path in steam_paths:
+        if os.path.isdir(steam_path):
+            for library in _get_steam_libraries(steam_path):
+                manifests.extend((entry.path, entry, _read_steam_app_manifest) for relative_path, entry in scan_folder(library) if entry.name.startswith("appmanifest_") and entry.name.endswith(".acf"))
+    for manifests_path in epic_manifests_paths:
+        if os.path.isdir(manifests_path):
+            manifests.extend((entry.path, entry, _read_epic_manifest) for relative_path, entry in scan_folder(manifests_path) if entry.name.endswith(".item"))
+
+    games = []
+    for path, entry, reader in manifests:
+        try:
+            stat = entry.stat()
+        except OSError:
+            continue
+        key = os.path.normcase(os.path.abspath(path))
+        previous = previous_cache.get(key)
+        if previous is not None and previous[0] == stat.st_mtime_ns and previous[1] == stat.st_size:
+            game = previous[2]
+        else:
+            try:
+                game = reader(path)
+            except (OSError, ValueError):
+                game = None
+        cache[key] = [stat.st_mtime_ns, stat.st_size, game]
+        if game is not None:
+            games.append(game)
+
+    if cache_path is not None and cache != previous_cache:
+        _save_json_cache(cache, cache_path)
+    return games
@@ -16,26 +16,21 @@ import shutil
 import icoextract
 from PIL import Image
 
+import store_detectors as sd
+
 
 def get_type_file(path: str) -> str:
     """Returns the type of the given file
 
     :param path: file to analyse
-    :return: type of the file ("steam" / "epic" / "uplay" / "exe" / "unknown")
+    :return: type of the file ("exe" / "unknown" or the name of the store of a .url file: "steam" / "epic" / "uplay"...)
     """
     if os.path.isfile(path):
         if path.endswith(".exe"):
             return "exe"
         elif path.endswith(".url"):
-            with open(path, "r") as f:
-                for line in f.readlines():
-                    if line.startswith("URL=steam://rungameid/"):
-                        return "steam"
-                    elif line.startswith("URL=com.epicgames.launcher://apps/"):
-                        return "epic"
-                    elif line.startswith("URL=uplay://launch/"):
-                        return "uplay"
-                return "unknown"
+            store = sd.detect_store_of_file(path)
+            return store if store is not None else "unknown"
         else:
             return "unknown"
     else:
@@ -83,8 +78,8 @@ def get_icon_from_exe(source: str, destination: str, png=True) -> str | None:
         return None
 
 
-def get_icon_steam_uplay(source: str, destination: str, png=True) -> str | None:
-    """Extracts the icon from a .url steam or uplay file and copies it to the destination
+def get_icon_from_url(source: str, destination: str, png=True) -> str | None:
+    """Extracts the icon from a .url file of a registered store and copies it to the destination
 
     :param source: .url file to get the icon from
     :param destination: destination (file path) to copy the icon to WITHOUT the format (.png or .ico)
@@ -92,50 +87,22 @@ def get_icon_steam_uplay(source: str, destination: str, png=True) -> str | None:
     :return: path the icon was copied to, None if an error occurred or if no icon were found
     """
     if os.path.isfile(source):
+        store = sd.detect_store_of_file(source)
+        if store is None:
+            return None
         try:
-            with open(source, "r") as f:
-                for line in f.readlines():
-                    if line.startswith("IconFile="):
-                        icon_path = line.removeprefix("IconFile=").removesuffix("\n")
-                        break
-                else:  # did not find any icon
-                    return None
-            if os.path.isfile(icon_path):
+            icon_path = sd.stores[store].icon_resolver(source)
+            if icon_path is None or not os.path.isfile(icon_path):
+                return None
+            elif icon_path.endswith(".exe"):
+                return get_icon_from_exe(icon_path, destination, png)
+            else:
                 destination = destination + ".ico"
                 shutil.copy2(icon_path, destination)
                 if png:
                     return ico_to_png(destination)
                 else:
                     return destination
-            else:
-                return None
-        except:
-            return None
-    else:
-        return None
-
-
-def get_icon_epic(source: str, destination: str, png=True) -> str | None:
-    """Extracts the icon from a .url epic games file and copies it to the destination
-
-    :param source: .url file to get the icon from
-    :param destination: destination (file path) to copy the icon to WITHOUT the format (.png or .ico)
-    :param png: if set to True, converts the .ico file into a .png file
-    :return: path the icon was copied to, None if an error occurred or if no icon were found
-    """
-    if os.path.isfile(source):
-        try:
-            with open(source, "r") as f:
-                for line in f.readlines():
-                    if line.startswith("IconFile="):
-                        exe_path = line.removeprefix("IconFile=").removesuffix("\n")
-                        break
-                else:  # did not find any exe
-                    return None
-            if os.path.isfile(exe_path):
-                return get_icon_from_exe(exe_path, destination, png)
-            else:
-                return None
         except:
             return None
     else:
@@ -0,0 +1,109 @@
+"""
+This file contains the registry of the game stores whose .url shortcuts can be detected by the APY! launcher
+
+Copyright (C) 2024  fastattack
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+See the license in the COPYING file or at <https://www.gnu.org/licenses/>.
+"""
+
+import re
+from typing import Callable
+
+
+def read_icon_file(path: str) -> str | None:
+    """Returns the icon path written in the given .url file (IconFile= line)
+
+    :param path: .url file to read
+    :return: path of the icon (.ico or .exe file), None if the file does not contain any icon or if it could not be read
+    """
+    try:
+        with open(path, "r") as f:
+            for line in f:
+                if line.startswith("IconFile="):
+                    return line.removeprefix("IconFile=").removesuffix("\n")
+    except (OSError, UnicodeDecodeError):
+        return None
+    return None
+
+
+class StoreDetector:
+    """ Detector of the .url shortcuts of a game store """
+    def __init__(self, name: str, url_pattern: str, icon_resolver: Callable[[str], str | None] = read_icon_file):
+        """
+        :param name: name of the store, returned as the type of the detected files
+        :param url_pattern: regex matching the start of the urls of the store (after "URL="), must not contain groups
+        :param icon_resolver: function returning the path of the icon (.ico file or .exe file to extract the icon from) of a .url file of the store, or None if there is no icon
+        """
+        self.name = name
+        self.url_pattern = url_pattern
+        self.icon_resolver = icon_resolver
+
+
+stores: dict[str, StoreDetector] = {}  # registered stores, in detection priority order
+_stores_order: list[str] = []  # names of the stores, index i corresponds to the group "s{i}" of _combined_matcher
+_combined_matcher = re.compile("(?!)")  # regex matching the urls of all the registered stores in one pass
+
+
+def _compile_combined_matcher():
+    """ Rebuilds the regex matching the urls of all the registered stores """
+    global _combined_matcher, _stores_order
+    _stores_order = list(stores)
+    if _stores_order:
+        alternatives = "|".join(f"(?P<s{index}>{stores[name].url_pattern})" for index, name in enumerate(_stores_order))
+        _combined_matcher = re.compile(f"^URL=(?:{alternatives})", re.MULTILINE)
+    else:
+        _combined_matcher = re.compile("(?!)")
+
+
+def register_store(detector: StoreDetector):
+    """Adds the given store to the detected stores, replaces the store with the same name if there is one
+
+    :param detector: detector of the store to add
+    """
+    stores[detector.name] = detector
+    _compile_combined_matcher()
+
+
+def unregister_store(name: str):
+    """Removes the given store from the detected stores, nothing happens if the store is not registered
+
+    :param name: name of the store to remove
+    """
+    if name in stores:
+        del stores[name]
+        _compile_combined_matcher()
+
+
+def detect_store(content: str) -> str | None:
+    """Returns the store of the given .url file content, the first URL= line matching a store is used
+
+    :param content: content of the .url file
+    :return: name of the store, None if no registered store matches
+    """
+    match = _combined_matcher.search(content)
+    if match is None:
+        return None
+    return _stores_order[int(match.lastgroup[1:])]
+
+
+def detect_store_of_file(path: str) -> str | None:
+    """Returns the store of the given .url file
+
+    :param path: .url file to analyse
+    :return: name of the store, None if no registered store matches or if the file could not be read
+    """
+    try:
+        with open(path, "r") as f:
+            return detect_store(f.read())
+    except (OSError, UnicodeDecodeError):
+        return None
+
+
+register_store(StoreDetector("steam", re.escape("steam://rungameid/")))
+register_store(StoreDetector("epic", re.escape("com.epicgames.launcher://apps/")))
+register_store(StoreDetector("uplay", re.escape("uplay://launch/")))
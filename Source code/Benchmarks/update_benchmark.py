@@ -0,0 +1,367 @@
+"""
+This file contains the benchmark of the update of the launcher: a synthetic "Downloads" folder is served by a local web server and the updater updates a synthetic launcher installation from it
+
+The update code of the updater runs without interface, the benchmark runs on any OS (the interface modules of the updater are not imported) and only needs requests.
+Run from the repository folder with: python "Source code/Benchmarks/update_benchmark.py" (--help for the options), for example:
+    python "Source code/Benchmarks/update_benchmark.py" --output baseline.json
+    python "Source code/Benchmarks/update_benchmark.py" --baseline baseline.json
+
+Copyright (C) 2024  fastattack
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+See the license in the COPYING file or at <https://www.gnu.org/licenses/>.
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import random
+import shutil
+import hashlib
+import zipfile
+import argparse
+import tempfile
+import threading
+import statistics
+import functools
+import importlib.util
+import http.server
+
+source_folder = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # "Source code" folder
+sys.path.insert(0, os.path.join(source_folder, "App"))
+
+import APY_launcher_updates as up
+from APY_update_language import CopyStats
+
+
+phases = ["versions check", "download", "unzip", "AUL apply", "cache cleanup", "messages"]  # phases of the update, in order
+_stages_phases = {1: "download", 2: "unzip", 3: "AUL apply", 4: "cache cleanup"}  # stage of the updater interface -> phase starting at this stage
+
+
+class BenchmarkError(Exception):
+    """ Error raised when the benchmarked update did not succeed """
+
+
+class RangeRequestHandler(http.server.SimpleHTTPRequestHandler):
+    """ Request handler serving the files of the synthetic tree, supports the single range requests used to read the archive without downloading it (like GitHub) """
+    def end_headers(self):
+        self.send_header("Accept-Ranges", "bytes")
+        super().end_headers()
+
+    def do_GET(self):
+        if not self.headers.get("Range", "").startswith("bytes="):
+            super().do_GET()
+            return
+        file_path = self.translate_path(self.path)
+        if not os.path.isfile(file_path):
+            self.send_error(404)
+            return
+        size = os.path.getsize(file_path)
+        start, end = self.headers["Range"].removeprefix("bytes=").split(",")[0].split("-")
+        if start == "":  # last bytes of the file ("bytes=-500")
+            start, end = max(size - int(end), 0), size - 1
+        else:
+            start, end = int(start), min(int(end), size - 1) if end else size - 1
+        if start >= size:
+            self.send_response(416)
+            self.send_header("Content-Range", f"bytes */{size}")
+            self.end_headers()
+            return
+        self.send_response(206)
+        self.send_header("Content-Type", self.guess_type(file_path))
+        self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        self.send_header("Content-Length", str(end - start + 1))
+        self.end_headers()
+        with open(file_path, "rb") as f:
+            f.seek(start)
+            self.wfile.write(f.read(end - start + 1))
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(folder: str) -> http.server.ThreadingHTTPServer:
+    """Starts a local web server serving the given folder in a daemon thread
+
+    :param folder: folder to serve
+    :return: started server, the port is in server.server_address[1]
+    """
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(RangeRequestHandler, directory=folder))
+    threading.Thread(target=server.serve_forever, name="benchmark: serving downloads", daemon=True).start()
+    return server
+
+
+def _get_file_content(rand: random.Random, index: int, size: int) -> bytes:
+    """ Returns the content of the synthetic file of the given index, half random (not compressible) and half repeated """
+    half = size // 2
+    return rand.randbytes(half) + (f"file {index}\n".encode() * (size // 8 + 1))[:size - half]
+
+
+def create_downloads_tree(folder: str, files: int, file_size: int, versions: int, delta: bool) -> dict[str, bytes]:
+    """Creates a synthetic "Downloads" folder for the main branch: versions files, AUL scripts, messages, language files and the archive of the launcher
+
+    :param folder: folder to create the "main/Downloads" tree in (served as the root of the web server)
+    :param files: number of files of the launcher archive
+    :param file_size: size of each file of the archive in bytes
+    :param versions: number of versions of the versions list (the update goes through all of them)
+    :param delta: if set to True, the manifest of the archive is published (delta update), else the whole archive is downloaded
+    :return: files of the archive: {path relative to the launcher folder: content}
+    """
+    downloads = os.path.join(folder, "main", "Downloads")
+    for subfolder in ("AUL commands", "Languages", "Messages"):
+        os.makedirs(os.path.join(downloads, subfolder), exist_ok=True)
+    versions_list = [f"2.{minor}.0" for minor in range(1, versions + 1)]
+
+    with open(os.path.join(downloads, "Versions.txt"), "w", encoding="utf-8") as f:
+        f.write(f"launcher={versions_list[-1]}\nupdater=2.0.0\nminversioninstaller=1.0.1\nminversionupdater=2.0.0")
+    with open(os.path.join(downloads, "Versions list.txt"), "w", encoding="utf-8") as f:
+        f.write("\n".join(versions_list))
+    for version in versions_list:
+        with open(os.path.join(downloads, "AUL commands", f"{version}.AUL"), "w", encoding="utf-8") as f:
+            f.write("\n".join([
+                'createdir "url shortcuts"',
+                'replacedir "_internal"',
+                'replacefile "APY! Launcher.exe"',
+                'replacefile "APY! Launcher Uninstaller.exe"',
+                f'createfile "cache/{version}.tmp"',
+                f'deletefile "cache/{version}.tmp"',
+                "update params.APYL rewriteline start branch= branch=main",
+                "update params.APYL newline end",
+                f"update params.APYL rewriteline index end version={version}",
+                'updatecsv "apps.csv" all add end',
+                f'updatecsv "apps.csv" game modify end {version}'
+            ]))
+        with open(os.path.join(downloads, "Messages", f"{version}.txt"), "w", encoding="utf-8") as f:
+            f.write(f"Patch notes of the version {version}")
+    for language in os.listdir(os.path.join(source_folder, os.pardir, "Downloads", "Languages")):
+        shutil.copyfile(os.path.join(source_folder, os.pardir, "Downloads", "Languages", language), os.path.join(downloads, "Languages", language))
+
+    rand = random.Random(0)
+    launcher_files = {"APY! Launcher.exe": _get_file_content(rand, -1, file_size * 4), "APY! Launcher Uninstaller.exe": _get_file_content(rand, -2, file_size * 2)}
+    for index in range(files - len(launcher_files)):
+        launcher_files[f"_internal/package {index // 100}/module {index}.pyd"] = _get_file_content(rand, index, file_size)
+    archive_path = os.path.join(downloads, "APY! Launcher.zip")
+    with zipfile.ZipFile(archive_path, "w", zipfile.ZIP_DEFLATED) as archive:
+        for file_path, content in launcher_files.items():
+            archive.writestr(f"APY! Launcher/{file_path}", content)
+    with open(archive_path, "rb") as f:
+        digest = hashlib.file_digest(f, "sha256").hexdigest()
+    with open(archive_path + ".sha256", "w", encoding="utf-8") as f:
+        f.write(f"{digest}  APY! Launcher.zip")
+    if delta:
+        with open(os.path.join(downloads, "APY! Launcher.manifest"), "w", encoding="utf-8") as f:
+            f.write("\n".join(f"{hashlib.sha256(content).hexdigest()} {len(content)} {file_path}" for file_path, content in launcher_files.items()))
+    return launcher_files
+
+
+def create_launcher_folder(folder: str, launcher_files: dict[str, bytes], changed: float):
+    """Creates a synthetic installation of the previous version of the launcher
+
+    :param folder: folder to create the installation in
+    :param launcher_files: files of the new version, returned by create_downloads_tree
+    :param changed: part of the files (0 to 1) that are different in the installation (the others are identical to the new version)
+    """
+    rand = random.Random(1)
+    for file_path, content in launcher_files.items():
+        target = os.path.join(folder, file_path)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, "wb") as f:
+            f.write(content[::-1] if rand.random() < changed else content)
+    os.makedirs(os.path.join(folder, "cache"), exist_ok=True)
+    os.makedirs(os.path.join(folder, "lng files"), exist_ok=True)
+    shutil.copyfile(os.path.join(source_folder, os.pardir, "Downloads", "Languages", "english.lng"), os.path.join(folder, "lng files", "english.lng"))
+    with open(os.path.join(folder, "params.APYL"), "w", encoding="utf-8") as f:
+        f.write("language=english\nbranch=Development\nignoredmessages=\n")
+    with open(os.path.join(folder, "apps.csv"), "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        for index in range(200):
+            writer.writerow([f"Game {index}", ("game", "bonus", "config")[index % 3], f"C:/Games/Game {index}.url", "normal"])
+
+
+def load_updater():
+    """ Imports the updater script, its interface modules are only imported when it is started """
+    spec = importlib.util.spec_from_file_location("apy_launcher_updater", os.path.join(source_folder, "Installers", "APY! Launcher Updater.py"))
+    updater = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(updater)
+    return updater
+
+
+def run_update(updater, launcher_folder: str) -> tuple[dict[str, float], CopyStats]:
+    """Updates the given launcher installation with the update code of the updater and the launcher, without interface
+
+    :param updater: module of the updater returned by load_updater
+    :param launcher_folder: folder of the launcher to update
+    :return: duration of each phase in seconds: {phase: duration}, and the statistics of the copied files
+    :raise BenchmarkError: if the update did not succeed
+    """
+
+    class HeadlessStep2(updater.Step2):
+        """ Installation step of the updater without interface, records when each stage of the update starts """
+        def __init__(self):
+            self._delta_manifest = None
+            self._cancel_event = threading.Event()
+            self.copy_stats = CopyStats()
+            self.stages = []  # (stage, time)
+
+        def _notify(self, stage: int):
+            self.stages.append((stage, time.perf_counter()))
+
+        def _download_progress(self, downloaded: int, total: int | None):
+            pass
+
+        def _apply_progress(self, copied: int, total: int):
+            pass
+
+    timings = {}
+    previous_folder = os.getcwd()
+    os.chdir(launcher_folder)  # the updater is started from the launcher folder
+    try:
+        start = time.perf_counter()
+        versions = up.check_versions(["minversionupdater", "launcher"], "main")
+        timings["versions check"] = time.perf_counter() - start
+        if versions == "connexion error" or "unknown" in versions.values():
+            raise BenchmarkError(f"Could not check the versions: {versions}")
+
+        updater.branch = "main"
+        updater.path = launcher_folder
+        updater.installing = False
+        updater.versions = versions
+        updater.github_version = versions["launcher"]
+        updater.launcher_version = up.get_file_version(os.path.join(launcher_folder, "APY! Launcher.exe"))
+        step = HeadlessStep2()
+        step._update()
+        if not step.stages or step.stages[-1][0] != 5:
+            raise BenchmarkError(f"The update stopped at the stage {step.stages[-1][0] if step.stages else None}")
+        for (stage, stage_start), (_, stage_end) in zip(step.stages, step.stages[1:]):
+            timings[_stages_phases[stage]] = stage_end - stage_start
+
+        start = time.perf_counter()
+        message = up.check_for_version_message(updater.launcher_version, versions["launcher"], "main")
+        timings["messages"] = time.perf_counter() - start
+        if message is None:
+            raise BenchmarkError("Could not get the messages of the new versions")
+    finally:
+        os.chdir(previous_folder)
+    return timings, step.copy_stats
+
+
+def run_benchmark(work_folder: str, files: int, file_size: int, versions: int, changed: float, delta: bool, repeat: int) -> tuple[dict[str, float], CopyStats]:
+    """Benchmarks the update of a synthetic launcher installation
+
+    :param work_folder: empty folder to create the synthetic files in
+    :param files: number of files of the launcher archive
+    :param file_size: size of each file of the archive in bytes
+    :param versions: number of versions the update goes through
+    :param changed: part of the files that are different in the installation
+    :param delta: if set to True, the update only downloads the changed files, else the whole archive
+    :param repeat: number of updates, the median of each phase is returned
+    :return: median duration of each phase in seconds, and of the whole update ("total"), and the statistics of the files copied by the last update
+    :raise BenchmarkError: if an update did not succeed
+    """
+    server_folder = os.path.join(work_folder, "server")
+    launcher_files = create_downloads_tree(server_folder, files, file_size, versions, delta)
+    server = start_server(server_folder)
+    up.set_update_source(f"http://127.0.0.1:{server.server_address[1]}/{{branch}}/Downloads/")
+    updater = load_updater()
+    results = []
+    copy_stats = None
+    try:
+        for index in range(repeat):
+            launcher_folder = os.path.join(work_folder, f"launcher {index}")
+            create_launcher_folder(launcher_folder, launcher_files, changed)
+            timings, copy_stats = run_update(updater, launcher_folder)
+            timings["total"] = sum(timings.values())
+            results.append(timings)
+            shutil.rmtree(launcher_folder, ignore_errors=True)
+    finally:
+        server.shutdown()
+        server.server_close()
+        up.set_update_source(None)
+    return {phase: statistics.median(timings[phase] for timings in results) for phase in phases + ["total"]}, copy_stats
+
+
+def compare_to_baseline(results: dict[str, dict[str, float]], baseline: dict[str, dict[str, float]], max_regression: float, min_difference: float) -> list[str]:
+    """Returns the phases slower than in the baseline
+
+    :param results: durations of the phases of each mode: {mode: {phase: duration}}
+    :param baseline: results of a previous benchmark, in the same format
+    :param max_regression: maximum slowdown allowed (0.25: 25% slower)
+    :param min_difference: minimum slowdown in seconds to report a phase (the shortest phases are noisy)
+    :return: descriptions of the regressions
+    """
+    regressions = []
+    for mode, timings in results.items():
+        for phase, duration in timings.items():
+            previous = baseline.get(mode, {}).get(phase)
+            if previous is not None and duration > previous * (1 + max_regression) and duration - previous > min_difference:
+                regressions.append(f"{mode} / {phase}: {previous:.3f}s -> {duration:.3f}s (+{(duration / previous - 1) * 100 if previous else float('inf'):.0f}%)")
+    return regressions
+
+
+def print_results(results: dict[str, dict[str, float]], copy_stats: dict[str, CopyStats]):
+    """ Prints the durations of the phases of each mode as a table, then the files copied by each mode """
+    modes = list(results)
+    print(f"{'phase':<16}" + "".join(f"{mode:>12}" for mode in modes))
+    for phase in phases + ["total"]:
+        print(f"{phase:<16}" + "".join(f"{results[mode][phase]:>11.3f}s" for mode in modes))
+    print()
+    for mode in modes:
+        print(f"{mode} copy: {copy_stats[mode]}")
+
+
+def main(arguments: list[str] = None) -> int:
+    """Runs the benchmark with the given command line arguments
+
+    :param arguments: command line arguments, sys.argv[1:] by default
+    :return: exit code: 0 if the benchmark succeeded, 1 if a phase is slower than in the baseline, 2 if an update failed
+    """
+    parser = argparse.ArgumentParser(description="Benchmark of the update of the launcher, served by a local web server")
+    parser.add_argument("--files", type=int, default=3000, help="number of files of the launcher archive")
+    parser.add_argument("--file-size", type=int, default=8192, help="size of each file of the archive in bytes")
+    parser.add_argument("--versions", type=int, default=5, help="number of versions the update goes through")
+    parser.add_argument("--changed", type=float, default=0.5, help="part of the files that are different in the installation (0 to 1)")
+    parser.add_argument("--mode", choices=["full", "delta", "both"], default="both", help="download the whole archive (full), only the changed files (delta) or both")
+    parser.add_argument("--repeat", type=int, default=3, help="number of updates per mode, the median is reported")
+    parser.add_argument("--output", help="json file to write the results to")
+    parser.add_argument("--baseline", help="json file of a previous benchmark (--output) to compare the results to")
+    parser.add_argument("--max-regression", type=float, default=0.25, help="maximum slowdown of a phase compared to the baseline (0.25: 25%%)")
+    parser.add_argument("--min-difference", type=float, default=0.05, help="minimum slowdown in seconds to report a regression")
+    args = parser.parse_args(arguments)
+
+    modes = ["full", "delta"] if args.mode == "both" else [args.mode]
+    results = {}
+    copy_stats = {}  # mode: statistics of the files copied by its last update
+    with tempfile.TemporaryDirectory(prefix="APY update benchmark ") as work_folder:
+        for mode in modes:
+            mode_folder = os.path.join(work_folder, mode)
+            os.makedirs(mode_folder)
+            try:
+                results[mode], copy_stats[mode] = run_benchmark(mode_folder, args.files, args.file_size, args.versions, args.changed, mode == "delta", args.repeat)
+            except BenchmarkError as e:
+                print(f"{mode} update failed: {e}", file=sys.stderr)
+                return 2
+    print_results(results, copy_stats)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(results, baseline, args.max_regression, args.min_difference)
+        if regressions:
+            print("\nRegressions compared to the baseline:", file=sys.stderr)
+            for regression in regressions:
+                print(f"- {regression}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
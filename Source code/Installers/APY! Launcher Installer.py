@@ -21,7 +21,7 @@ import pythoncom
 from win32com.client import Dispatch
 
 from custom_ctk_toplevels import get_resource_path, FileExplorer, showwarning, askyesno
-from APY_launcher_updates import check_versions
+from APY_launcher_updates import check_versions, download_language_files, get_update_source, is_newer_version
 
 
 _version = "1.0.1"
@@ -266,23 +266,15 @@ class Step5:
         # download
         self.reload_variable.set(2)
         try:
-            response = requests.get("https://github.com/fastattackv/APY-launcher/raw/main/Downloads/APY!%20Launcher.zip", timeout=(5, 10))
-            if response.status_code == 200:
-                with open(os.path.join(path, "APY! Launcher.zip"), "wb") as f:
-                    f.write(response.content)
-            else:
+            source = get_update_source("main")
+            if not source.download_file("APY! Launcher.zip", os.path.join(path, "APY! Launcher.zip"), source.get_digest("APY! Launcher.zip")):
+                self.reload_variable.set(5)
+                installing = False
+                return
+            if not download_language_files([f"{language}.lng" for language in languages], path, "main"):
                 self.reload_variable.set(5)
                 installing = False
                 return
-            for language in languages:
-                response = requests.get(f"https://github.com/fastattackv/APY-launcher/raw/main/Downloads/Languages/{language}.lng", timeout=(5, 10))
-                if response.status_code == 200:
-                    with open(os.path.join(path, f"{language}.lng"), "wb") as f:
-                        f.write(response.content)
-                else:
-                    self.reload_variable.set(5)
-                    installing = False
-                    return
         except requests.ConnectionError:
             self.reload_variable.set(5)
             installing = False
@@ -382,7 +374,7 @@ elif versions["minversioninstaller"] == "unknown":
     page = NotLaunchable("There was an error retrieving the version of the installer\n\nPlease try again later")
     page.show()
     win.mainloop()
-elif versions["minversioninstaller"] > _version:
+elif is_newer_version(versions["minversioninstaller"], _version):
     page = NotLaunchable("This installer is not up-to-date\n\nTo install the APY! launcher,\nplease download the last version of the installer")
     page.show()
     win.mainloop()
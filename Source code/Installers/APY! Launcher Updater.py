@@ -11,22 +11,25 @@ the Free Software Foundation, either version 3 of the License, or
 See the license in the COPYING file or at <https://www.gnu.org/licenses/>.
 """
 
-import customtkinter as ctk
 import os
 import sys
-import time
+import asyncio
 import threading
 import requests
 import shutil
 import zipfile
 import subprocess
-import csv
 
-from custom_ctk_toplevels import get_resource_path, showinfo, showwarning
-from APY_launcher_updates import check_versions, get_file_version
+from APY_launcher_updates import check_versions, get_file_version, download_delta, download_language_files, get_update_source, set_update_source, is_newer_version, VersionsIndex
+from APY_update_language import APYUpdateLanguageInterpreter, AULError, AULTransaction, CopyStats, copy_files
 
 
 _version = "2.0.0"
+persistent_cache_files = ("folders scan.json", "installed games.json", "last versions check.json")  # files of the cache folder kept after an update (scans of the games and last versions check of the launcher)
+
+
+class UpdateError(Exception):
+    """ Error raised when a file needed for the update could not be retrieved """
 
 
 def on_closing():
@@ -45,266 +48,6 @@ def is_path_a_launcher_path(path_to_check: str) -> bool:
         return False
 
 
-class APYUpdateLanguageInterpreter:
-    """ Interpreter to execute the commands to update the launcher files using the APY Update Language. To work, the cwd should be set to the launcher folder and the zip file should be unzipped """
-    def __init__(self):
-        self.commands = {
-            "replacefile": self.replacefile,
-            "replacedir": self.replacedir,
-            "createfile": self.createfile,
-            "createdir": self.createdir,
-            "deletefile": self.deletefile,
-            "deletedir": self.deletedir,
-            "update": self.update,
-            "updatecsv": self.updatecsv
-        }
-
-    @staticmethod
-    def parse_command(command: str) -> list[str]:
-        """ Parses the given command and returns the list of arguments """
-        in_quotation = False
-        parsed_command = []
-        current_argument = ""
-        for char in command:
-            if char == "\"":
-                in_quotation = not in_quotation
-            elif char == " " and not in_quotation:
-                parsed_command.append(current_argument)
-                current_argument = ""
-            else:
-                current_argument += char
-        if current_argument != "":
-            parsed_command.append(current_argument)
-        return parsed_command
-
-    def execute(self, command: str) -> bool:
-        """ Executes the given command, returns False if there was an error, True otherwise """
-        command = self.parse_command(command)
-        if command[0] in self.commands:
-            return self.commands[command[0]](command[1:])
-        else:
-            return False
-
-    @staticmethod
-    def replacefile(arguments: list[str]):
-        if len(arguments) == 1:
-            launcher_folder = os.path.abspath(os.getcwd())
-            old_file = os.path.join(launcher_folder, arguments[0])
-            new_file = os.path.join(launcher_folder, "cache/APY! Launcher", arguments[0])
-            if os.path.isfile(new_file):  # the new file exists
-                if os.path.isfile(old_file):  # there is a file to replace
-                    os.remove(old_file)
-                shutil.copy2(new_file, old_file)
-            else:
-                return False
-        else:
-            return False
-
-    @staticmethod
-    def replacedir(arguments: list[str]):
-        if len(arguments) == 1:
-            launcher_folder = os.path.abspath(os.getcwd())
-            old_dir = os.path.join(launcher_folder, arguments[0])
-            new_dir = os.path.join(launcher_folder, "cache/APY! Launcher", arguments[0])
-
-            for file in os.listdir(old_dir):  # remove all files in old dir
-                full_path = os.path.join(old_dir, file)
-                if os.path.isfile(full_path):
-                    os.remove(full_path)
-                else:
-                    shutil.rmtree(full_path)
-
-            for file in os.listdir(new_dir):  # copy all new files
-                src = os.path.join(new_dir, file)
-                dst = os.path.join(old_dir, file)
-                if os.path.isfile(src):
-                    shutil.copy2(src, dst)
-                else:
-                    shutil.copytree(src, dst)
-
-            else:
-                return False
-        else:
-            return False
-
-    @staticmethod
-    def createfile(arguments: list[str]):
-        if len(arguments) == 1:
-            path = os.path.join(os.path.abspath(os.getcwd()), arguments[0])
-            if not os.path.isfile(path):
-                with open(path, "x"):
-                    pass
-            return True
-        else:
-            return False
-
-    @staticmethod
-    def createdir(arguments: list[str]):
-        if len(arguments) == 1:
-            path = os.path.join(os.path.abspath(os.getcwd()), arguments[0])
-            if not os.path.isdir(path):
-                os.mkdir(path)
-            return True
-        else:
-            return False
-
-    @staticmethod
-    def deletefile(arguments: list[str]):
-        if len(arguments) == 1:
-            path = os.path.join(os.path.abspath(os.getcwd()), arguments[0])
-            if os.path.isfile(path):
-                os.remove(path)
-            return True
-        else:
-            return False
-
-    @staticmethod
-    def deletedir(arguments: list[str]):
-        if len(arguments) == 1:
-            path = os.path.join(os.path.abspath(os.getcwd()), arguments[0])
-            if os.path.isdir(path):
-                if os.listdir(path):  # not empty
-                    shutil.rmtree(path)
-                else:
-                    os.rmdir(path)
-            return True
-        else:
-            return False
-
-    @staticmethod
-    def update(arguments: list[str]):
-        path = os.path.join(os.path.abspath(os.getcwd()), arguments[0])
-        if os.path.isfile(path):
-
-            if arguments[1] == "newline" and len(arguments) == 3:
-                if arguments[2].isnumeric() or arguments[2] == "end":
-                    with open(path, "r", encoding="utf-8") as f:
-                        content = f.readlines()
-                    index = int(arguments[2]) if arguments[2].isnumeric() else len(content)
-                    content.insert(index, "\n")
-                    with open(path, "w", encoding="utf-8") as f:
-                        f.writelines(content)
-                    return True
-                else:
-                    return False
-
-            elif arguments[1] == "deleteline" and len(arguments) == 4:
-                if (arguments[2] == "index" and arguments[3].isnumeric()) or (arguments[2] == "start"):
-                    with open(path, "r", encoding="utf-8") as f:
-                        content = f.readlines()
-                    if arguments[2] == "index" and arguments[3].isnumeric():
-                        index = int(arguments[3])
-                    else:
-                        for x in range(len(content)):
-                            if content[x].startswith(arguments[3]):
-                                index = x
-                                break
-                        else:
-                            return False
-                    content.pop(index)
-                    with open(path, "w", encoding="utf-8") as f:
-                        f.writelines(content)
-                    return True
-                else:
-                    return False
-
-            elif arguments[1] == "rewriteline" and len(arguments) == 5:
-                if (arguments[2] == "index" and arguments[3].isnumeric() or arguments[2] == "index" and arguments[3] == "end") or arguments[2] == "start":
-                    with open(path, "r", encoding="utf-8") as f:
-                        content = f.readlines()
-                        print(content)
-                    if arguments[2] == "index" and arguments[3].isnumeric():
-                        index = int(arguments[3])
-                    elif arguments[2] == "index" and arguments[3] == "end":
-                        index = len(content) - 1
-                    else:  # start
-                        for x in range(len(content)):
-                            if content[x].startswith(arguments[3]):
-                                index = x
-                                break
-                        else:
-                            return False
-                    if arguments[3] == "end" and content[index] != "\n" and content[index].endswith("\n"):
-                        content.append(arguments[4])
-                    else:
-                        content[index] = arguments[4] + "\n"
-                    with open(path, "w", encoding="utf-8") as f:
-                        f.writelines(content)
-                    return True
-                else:
-                    return False
-
-            elif arguments[1] == "modifyline" and len(arguments) == 7:
-                if ((arguments[2] == "index" and arguments[3].isnumeric()) or arguments[2] == "start") and arguments[5].isnumeric():
-                    with open(path, "r", encoding="utf-8") as f:
-                        content = f.readlines()
-                    splitter_char = arguments[4]
-                    if arguments[2] == "index" and arguments[3].isnumeric():
-                        index = int(arguments[3])
-                    else:
-                        for x in range(len(content)):
-                            if content[x].startswith(arguments[3]):
-                                index = x
-                                break
-                        else:
-                            return False
-                    line = content[index]
-                    line = line.split(splitter_char)
-                    line[int(arguments[5])] = arguments[6]
-                    line = splitter_char.join(line)
-                    line += "\n"
-                    content[index] = line
-                    with open(path, "w", encoding="utf-8") as f:
-                        f.writelines(content)
-                    return True
-                else:
-                    return False
-
-            else:
-                return False
-        else:
-            return False
-
-    @staticmethod
-    def updatecsv(arguments: list[str]):
-        if (len(arguments) == 4 and arguments[2] in ["add", "delete"]) or (len(arguments) == 5 and arguments[2] == "modify"):
-            path = os.path.join(os.path.abspath(os.getcwd()), arguments[0])
-            if os.path.isfile(path):
-                if arguments[1] in ["game", "bonus", "config", "folder", "all"]:
-                    if arguments[3].isnumeric() or arguments[3] == "end":
-
-                        new_content = []
-                        with open(path, "r", encoding="utf-8", newline="") as f:
-                            reader = csv.reader(f, delimiter=",", quotechar='"', doublequote=True)
-                            for line in reader:
-                                if line[1] == arguments[1] or arguments[1] == "all":
-                                    if arguments[2] == "add":
-                                        index = int(arguments[3]) if arguments[3].isnumeric() else len(line)
-                                        line.insert(index, "")
-                                    elif arguments[2] == "delete":
-                                        index = int(arguments[3]) if arguments[3].isnumeric() else len(line) - 1
-                                        line.pop(index)
-                                    else:  # modify
-                                        index = int(arguments[3]) if arguments[3].isnumeric() else len(line) - 1
-                                        line[index] = arguments[4]
-                                    new_content.append(line)
-                                else:
-                                    new_content.append(line)
-                        with open(path, "w", encoding="utf-8", newline="") as f:
-                            writer = csv.writer(f, delimiter=",", quotechar='"')
-                            writer.writerows(new_content)
-                        return True
-
-                    else:
-                        return False
-                else:
-                    return False
-            else:
-                return False
-        else:
-            return False
-
-
 def hide_all():
     step_1.hide()
     step_2.hide()
@@ -350,12 +93,9 @@ class Step2:
         self.current_process_label = ctk.CTkLabel(win, text="")
         self.reload_variable = ctk.IntVar(win, 0)  # variable to change widgets on the interface
         self.reload_variable.trace_add("write", self.reload)
-        self._connexion_error = False
-        self._other_error = False
-        self._launcher_files_downloaded = False
-        self._langage_files_downloaded = False
-        self._AUL_commands_downloaded = False
-        self._AUL_commands = None
+        self._delta_manifest = None  # manifest of the release if only the changed files were downloaded
+        self._cancel_event = threading.Event()  # set when a download failed to stop the other downloads
+        self.copy_stats = CopyStats()  # files copied by the update, shown at the end
 
     def show(self):
         hide_all()
@@ -394,7 +134,7 @@ class Step2:
             self.current_process_label.configure(text="Deleting temporary files")
         elif var == 5:  # end
             self.progress_bar.set(1)
-            self.current_process_label.configure(text="Done")
+            self.current_process_label.configure(text=f"Done\n{self.copy_stats}")
             self.title_label.configure(text="Update is done")
             ctk.CTkButton(win, text="Start the launcher", command=lambda a=os.path.join(path, "APY! Launcher.exe"): self.start_launcher(a, [f"updatedfrom={launcher_version}"])).grid(row=3, column=0, pady=10, padx=10)
             ctk.CTkButton(win, text="Exit", command=win.destroy).grid(row=3, column=1, pady=10, padx=10)
@@ -407,95 +147,81 @@ class Step2:
             self.title_label.configure(text="Update stopped: an error occurred when updating")
             ctk.CTkButton(win, text="Exit", command=win.destroy).grid(row=3, column=1, pady=50, padx=10)
 
+    def _notify(self, stage: int):
+        """ Sends the given stage (value of self.reload_variable) to the interface, can be called from any thread """
+        win.after(0, self.reload_variable.set, stage)
+
+    def _download_progress(self, downloaded: int, total: int | None):
+        """ Sends the progress of the launcher zip download to the interface """
+        if total:
+            win.after(0, self.progress_bar.set, 0.6 * downloaded / total)
+
     def _download_launcher_files(self):
-        """ Downloads the launcher zip and writes it to the cache folder """
-        global installing
-        try:
-            # APY! Launcher.zip
-            response = requests.get(f"https://github.com/fastattackv/APY-launcher/raw/{branch}/Downloads/APY!%20Launcher.zip", timeout=(5, 10))
-            if response.status_code == 200:
-                with open(os.path.join(path, "cache/APY! Launcher.zip"), "wb") as f:
-                    f.write(response.content)
-            else:
-                self.reload_variable.set(7)
-                self._other_error = True
-                return
-        except requests.ConnectionError:
-            self.reload_variable.set(6)
-            self._connexion_error = True
-        except requests.Timeout:
-            self.reload_variable.set(6)
-            self._connexion_error = True
-        except:
-            self.reload_variable.set(7)
-            self._other_error = True
-        else:
-            self._launcher_files_downloaded = True
+        """ Downloads the launcher files to the cache folder: only the changed files if the release has a manifest, else the launcher zip """
+        self._delta_manifest = download_delta(branch, path, os.path.join(path, "cache/APY! Launcher"), self._cancel_event)
+        if self._delta_manifest is None:
+            source = get_update_source(branch)
+            if not source.download_file("APY! Launcher.zip", os.path.join(path, "cache/APY! Launcher.zip"), source.get_digest("APY! Launcher.zip"), self._download_progress, self._cancel_event):
+                raise UpdateError("Could not download APY! Launcher.zip")
+
+    def _apply_progress(self, copied: int, total: int):
+        """ Sends the progress of the copy of the launcher files to the interface """
+        if total:
+            win.after(0, self.progress_bar.set, 0.8 + 0.1 * copied / total)
 
     def _download_language_files(self, languages: list[str]):
-        """ Downloads the languages files needed and writes them to the cache folder """
-        global installing
-        try:
-            for file in languages:
-                response = requests.get(f"https://github.com/fastattackv/APY-launcher/raw/{branch}/Downloads/Languages/{file}", timeout=(5, 10))
-                if response.status_code == 200:
-                    with open(os.path.join(path, f"cache/{file}"), "wb") as f:
-                        f.write(response.content)
-                else:
-                    self.reload_variable.set(7)
-                    self._other_error = True
-                    return
-        except requests.ConnectionError:
-            self.reload_variable.set(6)
-            self._connexion_error = True
-        except requests.Timeout:
-            self.reload_variable.set(6)
-            self._connexion_error = True
-        except:
-            self.reload_variable.set(7)
-            self._other_error = True
-        else:
-            self._langage_files_downloaded = True
+        """ Downloads the languages files needed at the same time and writes them to the cache folder """
+        if not download_language_files(languages, os.path.join(path, "cache"), branch, cancel_event=self._cancel_event):
+            raise UpdateError("Could not download the language files")
 
-    def _get_update_commands_list(self, initial_version: str, current_version: str):
+    def _get_update_commands_list(self, initial_version: str, current_version: str) -> list[str]:
         """Returns the update commands for the versions between the given initial_version and the given current_version
 
         :param initial_version: version of the launcher before update
         :param current_version: current version of the launcher
-        :return: list of the commands to update the files to the current version or None if there was an error (connexion failed...)
+        :return: list of the commands to update the files to the current version
+        :raise UpdateError: if a file could not be downloaded or if the downloads were cancelled
+        :raise ValueError: if one of the versions is invalid
         """
-        global installing
-        try:
-            # changed files
-            versions_list = requests.get(f"https://github.com/fastattackv/APY-launcher/raw/{branch}/Downloads/Versions%20list.txt", timeout=(5, 10))
-            if versions_list.status_code == 200:
-                versions_list = versions_list.text.split("\n")
-                versions_to_update = [version for version in versions_list if initial_version < version <= current_version]
-                commands = []
-                for version in versions_to_update:
-                    response = requests.get(f"https://github.com/fastattackv/APY-launcher/raw/{branch}/Downloads/AUL%20commands/{version}.AUL", timeout=(5, 10))
-                    if response.status_code == 200:
-                        commands.extend(response.text.split("\n"))
-                    else:
-                        self.reload_variable.set(7)
-                        self._other_error = True
-                        return
-            else:
-                self.reload_variable.set(7)
-                self._other_error = True
-                return
-        except requests.ConnectionError:
-            self.reload_variable.set(6)
-            self._connexion_error = True
-        except requests.Timeout:
-            self.reload_variable.set(6)
-            self._connexion_error = True
-        except:
-            self.reload_variable.set(7)
-            self._other_error = True
-        else:
-            self._AUL_commands = commands
-            self._AUL_commands_downloaded = True
+        source = get_update_source(branch)
+        versions_list = source.get_text("Versions list.txt")
+        if versions_list is None:
+            raise UpdateError("Could not download the versions list")
+        versions_to_update = VersionsIndex(versions_list.split("\n"), branch).between(initial_version, current_version)
+        commands = []
+        for version in versions_to_update:
+            if self._cancel_event.is_set():
+                raise UpdateError("The download of the AUL commands was cancelled")
+            response = source.get_text(f"AUL commands/{version}.AUL")
+            if response is None:
+                raise UpdateError(f"Could not download the AUL commands of the version {version}")
+            commands.extend(response.split("\n"))
+        return commands
+
+    async def _download_files(self, languages: list[str]) -> list[str]:
+        """Downloads the launcher files, the language files and the AUL commands at the same time, stops the other downloads at the first error
+
+        :param languages: language files to download
+        :return: list of the AUL commands to execute
+        :raise UpdateError: if a file could not be downloaded
+        :raise requests.ConnectionError: if the connexion failed
+        :raise requests.Timeout: if the server did not respond in time
+        """
+        tasks = [
+            asyncio.create_task(asyncio.to_thread(self._download_launcher_files), name="updater: downloading launcher files"),
+            asyncio.create_task(asyncio.to_thread(self._download_language_files, languages), name="updater: downloading language files"),
+            asyncio.create_task(asyncio.to_thread(self._get_update_commands_list, launcher_version, versions["launcher"]), name="updater: downloading AUL commands")
+        ]
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        if pending:  # an error occurred: the other downloads are useless, the threads stop at their next chunk
+            self._cancel_event.set()
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        for task in tasks:
+            if task in done and task.exception() is not None:
+                raise task.exception()
+        return tasks[2].result()
 
     def update(self):
         thread = threading.Thread(target=self._update, name="updater: updating launcher")
@@ -504,64 +230,81 @@ class Step2:
     def _update(self):
         global installing
         installing = True
+        try:
+            asyncio.run(self._update_launcher())
+        finally:
+            installing = False
 
-        self.reload_variable.set(1)  # download
+    def _stop(self, stage: int):
+        """ Stops the update: the window can be closed and the given error stage (6 / 7) is sent to the interface """
+        global installing
+        installing = False
+        self._notify(stage)
+
+    async def _update_launcher(self):
+        """ Downloads the files and updates the launcher, sends the progress to the interface """
+        self._notify(1)  # download
         languages_to_download = [file for file in os.listdir("lng files") if os.path.isfile(os.path.join("lng files", file)) and file.endswith(".lng")]
-        threading.Thread(target=self._download_launcher_files, name="updater: downloading launcher files").start()
-        threading.Thread(target=self._download_language_files, args=[languages_to_download], name="updater: downloading language files").start()
-        threading.Thread(target=self._get_update_commands_list, args=[launcher_version, versions["launcher"]], name="updater: downloading AUL commands").start()
-        while (not self._launcher_files_downloaded or not self._langage_files_downloaded or not self._AUL_commands_downloaded) and (not self._connexion_error or not self._other_error):  # wait until all downloads are complete
-            time.sleep(0.1)
-        if self._connexion_error or self._other_error:  # stop installation if there is an error
-            installing = False
+        try:
+            commands = await self._download_files(languages_to_download)
+        except (requests.ConnectionError, requests.Timeout):
+            self._stop(6)
+            return
+        except Exception:
+            self._stop(7)
+            return
+
+        self._notify(2)  # reading the archive, the files are extracted directly to their destination by the AUL commands
+        archive = None
+        if self._delta_manifest is None:  # whole archive downloaded
+            try:
+                archive = zipfile.ZipFile(os.path.join(path, "cache/APY! Launcher.zip"), "r")
+            except (OSError, zipfile.BadZipFile):
+                self._stop(7)
+                return
 
-        else:  # no errors
-            self.reload_variable.set(2)  # unzip
-            with zipfile.ZipFile(os.path.join(path, "cache/APY! Launcher.zip"), "r") as f:
-                f.extractall(os.path.join(path, "cache"))
-
-            self.reload_variable.set(3)  # updating launcher files
-            # AUL commands
-            interpreter = APYUpdateLanguageInterpreter()
-            if self._AUL_commands is not None:
-                for command in self._AUL_commands:
-                    resp = interpreter.execute(command)
-                    if not resp:  # an error occurred
-                        self.reload_variable.set(7)
-                        installing = False
-            else:
-                self.reload_variable.set(7)
-                installing = False
-            # replace old language files
-            for file in languages_to_download:
-                if os.path.isfile(os.path.join("cache", file)):
-                    if os.path.isfile(f"lng files/{file}"):  # remove previous lng file
-                        os.remove(f"lng files/{file}")
-                    shutil.copy2(f"cache/{file}", f"lng files/{file}")
-
-            self.reload_variable.set(4)  # deleting cache files
-            for filename in os.listdir("cache"):
-                file_path = os.path.join("cache", filename)
-                try:
-                    if os.path.isfile(file_path) or os.path.islink(file_path):
-                        os.remove(file_path)
-                    elif os.path.isdir(file_path):
-                        shutil.rmtree(file_path)
-                except:
-                    self.reload_variable.set(7)
-                    installing = False
-                    break
+        self._notify(3)  # updating launcher files
+        # AUL commands: all the commands are validated before any file is modified, the commands of the intermediate versions replaced by the following ones are removed
+        interpreter = APYUpdateLanguageInterpreter(self._delta_manifest, archive=archive)
+        self.copy_stats = interpreter.copy_stats
+        try:
+            interpreter.run(interpreter.compile(commands).collapse(), self._apply_progress)
+        except AULError:
+            self._stop(7)
+            return
+        finally:
+            if archive is not None:
+                archive.close()
+        # replace old language files
+        try:
+            copy_files([(f"cache/{file}", f"lng files/{file}") for file in languages_to_download if os.path.isfile(os.path.join("cache", file))], stats=self.copy_stats)
+        except OSError:
+            self._stop(7)
+            return
+
+        self._notify(4)  # deleting cache files
+        for filename in os.listdir("cache"):
+            if filename in persistent_cache_files:
+                continue
+            file_path = os.path.join("cache", filename)
+            try:
+                if os.path.isfile(file_path) or os.path.islink(file_path):
+                    os.remove(file_path)
+                elif os.path.isdir(file_path):
+                    shutil.rmtree(file_path)
+            except OSError:
+                self._stop(7)
+                return
 
-            else:  # no errors while deleting cache files
-                self.reload_variable.set(5)  # end
-                installing = False
+        self._notify(5)  # end
 
 
 def show_step_1():
     global launcher_version
     if is_path_a_launcher_path(path):
+        AULTransaction.recover()  # restores the previous files if an update was interrupted
         launcher_version = get_file_version(os.path.join(path, "APY! Launcher.exe"))
-        if launcher_version < github_version:
+        if is_newer_version(github_version, launcher_version):
             step_1.show()
         else:
             showinfo("APY! Launcher Updater", f"The launcher is up-to-date: {launcher_version}")
@@ -577,67 +320,80 @@ def show_step_2():
     step_2.update()
 
 
-# defining window
-win = ctk.CTk()
-win.geometry("400x250")
-win.iconbitmap(get_resource_path("launcher data/launcher_icon.ico"))
-win.title("APY! Launcher Updater")
-win.resizable(False, False)
-win.grid_columnconfigure(0, weight=1)
-win.grid_columnconfigure(1, weight=1)
-win.protocol("WM_DELETE_WINDOW", on_closing)
-
-# defining ctk variables
-subhead_font = ctk.CTkFont(size=19, weight="bold")
-bold_font = ctk.CTkFont(size=13, weight="bold")
-
-# checking branch to update from
-if len(sys.argv) > 1:
-    if sys.argv[1] == "branch=main":
-        branch = "main"
-    elif sys.argv[1] == "branch=Development":
-        branch = "Development"
-    else:
-        raise Exception(f"The given argument to specify what branch to update from is invalid: {sys.argv[1]}")
-else:  # no argument
+if __name__ == "__main__":  # the classes can be imported without starting the updater (see Benchmarks/update_benchmark.py)
+    # the interface modules are only imported when the updater is started: the update code can be imported without display, on any OS
+    import customtkinter as ctk
+    from custom_ctk_toplevels import get_resource_path, showinfo, showwarning
+
+    # defining window
+    win = ctk.CTk()
+    win.geometry("400x250")
+    win.iconbitmap(get_resource_path("launcher data/launcher_icon.ico"))
+    win.title("APY! Launcher Updater")
+    win.resizable(False, False)
+    win.grid_columnconfigure(0, weight=1)
+    win.grid_columnconfigure(1, weight=1)
+    win.protocol("WM_DELETE_WINDOW", on_closing)
+
+    # defining ctk variables
+    subhead_font = ctk.CTkFont(size=19, weight="bold")
+    bold_font = ctk.CTkFont(size=13, weight="bold")
+
+    # checking branch to update from
+    if len(sys.argv) > 1:
+        if sys.argv[1] == "branch=main":
+            branch = "main"
+        elif sys.argv[1] == "branch=Development":
+            branch = "Development"
+        else:
+            raise Exception(f"The given argument to specify what branch to update from is invalid: {sys.argv[1]}")
+    else:  # no argument
+        if os.path.isfile("params.APYL"):
+            with open("params.APYL", "r", encoding="utf-8") as f:
+                for line in f.readlines():
+                    line = line.removesuffix("\n")
+                    if line.startswith("branch="):
+                        branch = line.split("=", 1)[1]
+                        if branch not in ("main", "Development"):
+                            raise Exception(f"The branch to update from in params.APYL is invalid: {branch}")
+                        else:
+                            break
+                else:
+                    raise Exception("Did not find a branch parameter in the params.APYL file")
+        else:
+            raise Exception("Did not find a params.APYL file to get the branch to update from")
+
+    # checking the location to update from (optional parameter)
     if os.path.isfile("params.APYL"):
         with open("params.APYL", "r", encoding="utf-8") as f:
             for line in f.readlines():
-                line = line.removesuffix("\n")
-                if line.startswith("branch="):
-                    branch = line.split("=", 1)[1]
-                    if branch not in ("main", "Development"):
-                        raise Exception(f"The branch to update from in params.APYL is invalid: {branch}")
-                    else:
-                        break
-            else:
-                raise Exception("Did not find a branch parameter in the params.APYL file")
-    else:
-        raise Exception("Did not find a params.APYL file to get the branch to update from")
-
-installing = False
-versions = check_versions(["minversionupdater", "launcher"], branch)
-
-# starting the installer
-if versions == "connexion error":
-    page = NotLaunchable("Connexion failed\n\nPlease check your connexion or try again later")
-    page.show()
-    win.mainloop()
-elif "unknown" in versions.values():
-    page = NotLaunchable("There was an error retrieving the version of the installer\n\nPlease try again later")
-    page.show()
-    win.mainloop()
-elif versions["minversionupdater"] > _version:
-    page = NotLaunchable("This installer is not up-to-date\n\nTo update the APY! launcher,\nplease download the last version of the updater")
-    page.show()
-    win.mainloop()
-else:  # updater is up-to-date
-    path = os.getcwd()
-    launcher_version = ""
-    github_version = versions["launcher"]  # launcher version to download
-
-    step_1 = Step1()
-    step_2 = Step2()
-
-    show_step_1()
-    win.mainloop()
+                if line.startswith("updatesource="):
+                    set_update_source(line.removesuffix("\n").split("=", 1)[1])
+                    break
+
+    installing = False
+    versions = check_versions(["minversionupdater", "launcher"], branch)
+
+    # starting the installer
+    if versions == "connexion error":
+        page = NotLaunchable("Connexion failed\n\nPlease check your connexion or try again later")
+        page.show()
+        win.mainloop()
+    elif "unknown" in versions.values():
+        page = NotLaunchable("There was an error retrieving the version of the installer\n\nPlease try again later")
+        page.show()
+        win.mainloop()
+    elif is_newer_version(versions["minversionupdater"], _version):
+        page = NotLaunchable("This installer is not up-to-date\n\nTo update the APY! launcher,\nplease download the last version of the updater")
+        page.show()
+        win.mainloop()
+    else:  # updater is up-to-date
+        path = os.getcwd()
+        launcher_version = ""
+        github_version = versions["launcher"]  # launcher version to download
+
+        step_1 = Step1()
+        step_2 = Step2()
+
+        show_step_1()
+        win.mainloop()
@@ -0,0 +1,163 @@
+"""
+This file contains the regression tests of the interpreter of the APY Update Language (AUL)
+
+Run from the repository folder with: python -m unittest discover -s "Source code/Tests"
+
+Copyright (C) 2024  fastattack
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+See the license in the COPYING file or at <https://www.gnu.org/licenses/>.
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "App"))
+
+from APY_update_language import AULError, APYUpdateLanguageInterpreter, LineIndex
+
+
+class LauncherFolderTestCase(unittest.TestCase):
+    """ Test case running in a temporary launcher folder (the cwd of the interpreter) """
+    def setUp(self):
+        self._previous_folder = os.getcwd()
+        self._folder = tempfile.TemporaryDirectory()
+        os.chdir(self._folder.name)
+        os.mkdir("cache")
+
+    def tearDown(self):
+        os.chdir(self._previous_folder)
+        self._folder.cleanup()
+
+    @staticmethod
+    def write(path: str, content: str):
+        """ Creates the given file and its parent directories """
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            f.write(content)
+
+    @staticmethod
+    def read(path: str) -> str:
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            return f.read()
+
+
+class TestReplaceDir(LauncherFolderTestCase):
+    def test_delta_keeps_unchanged_files_with_mixed_case(self):
+        # simulates the case-insensitive paths of Windows: the paths of the script are normcased, not the ones of the manifest
+        with mock.patch("os.path.normcase", str.lower):
+            self.write("data/Sub/File.TXT", "unchanged")
+            self.write("data/VCRUNTIME140.dll", "unchanged dll")
+            manifest = {"Data/Sub/File.TXT": ("", 9), "Data/VCRUNTIME140.dll": ("", 13)}
+            interpreter = APYUpdateLanguageInterpreter(manifest)
+            self.assertTrue(interpreter.execute_all(['replacedir "Data"']))
+        self.assertEqual(self.read("data/Sub/File.TXT"), "unchanged")
+        self.assertEqual(self.read("data/VCRUNTIME140.dll"), "unchanged dll")
+
+
+class TestLineIndex(unittest.TestCase):
+    def test_index_follows_lines_moved_by_insert_and_pop(self):
+        index = LineIndex(["a=1\n", "b=2\n", "ab=3\n"])
+        with mock.patch.object(LineIndex, "_build", wraps=index._build) as build:
+            self.assertEqual(index.find("ab"), 2)
+            index.insert(0, "ab=0\n")
+            self.assertEqual(index.find("ab="), 0)
+            self.assertEqual(index.find("b"), 2)
+            index.pop(1)
+            self.assertEqual(index.find("b"), 1)
+            self.assertEqual(index.find("ab=3"), 2)
+            index.pop(0)
+            self.assertEqual(index.find("ab"), 1)
+            self.assertIsNone(index.find("a=1"))
+            build.assert_called_once()
+
+
+class TestUpdate(LauncherFolderTestCase):
+    """ The results are the ones of the previous interpreter, which wrote the file and read it again after each command """
+    def assert_update(self, content: str, commands: list[str], expected: str):
+        self.write("f.txt", content)
+        self.assertTrue(APYUpdateLanguageInterpreter().execute_all([f"update f.txt {command}" for command in commands]))
+        self.assertEqual(self.read("f.txt"), expected)
+
+    def test_newline_ends_last_line_without_line_break(self):
+        self.assert_update("a=2", ["newline end", "rewriteline index end X"], "a=2\nX")
+
+    def test_launcher_2_1_0_params_without_final_line_break(self):
+        commands = ["newline end", "rewriteline index end ignoredmessages=", "newline end", "rewriteline index end branch=main"]
+        self.assert_update("language=english\nstoplauncherwhengame=1", commands, "language=english\nstoplauncherwhengame=1\nignoredmessages=\nbranch=main")
+
+    def test_modifyline_keeps_line_break_of_last_field(self):
+        # the line break stays in the last field: modifying another field adds an empty line
+        self.assert_update("k=\nab=\nba=2\n", ["modifyline index 0 = 0 q", "deleteline index 1"], "q=\nab=\nba=2\n")
+
+    def test_fuzz_newline_after_modified_lines(self):
+        commands = ['deleteline start "la"', "newline 6", 'modifyline start "ba" = 0 q', "deleteline index 0"]
+        self.assert_update("language\nab=\nlang=2\nlang=v,w\nba=\nb", commands, "lang=2\nlang=v,w\nq=\n\nb\n")
+
+    def test_fuzz_newline_end_after_rewrites(self):
+        commands = ['rewriteline start "lang" "ab=s"', "deleteline index 0", 'modifyline start "lang" = 0 q', 'rewriteline index 6 "ba=z"', "newline end"]
+        self.assert_update("lang=v,w\nk=\nabc=1\nx=y=2\nk=2\nx=y=1\nlanguage=\nabc", commands, "k=\nabc=1\nx=y=2\nk=2\nx=y=1\nq=\nba=z\nabc\n")
+
+
+class TestCollapse(LauncherFolderTestCase):
+    def run_collapsed(self, commands: list[str]):
+        interpreter = APYUpdateLanguageInterpreter()
+        interpreter.run(interpreter.compile(commands).collapse())
+
+    def test_keeps_delete_of_replaced_child(self):
+        # D/s comes with the new version of D: createdir does not create it, deletedir must still delete it
+        os.mkdir("D")
+        self.write("cache/APY! Launcher/D/s/file", "new")
+        self.run_collapsed(['replacedir "D"', 'createdir "D/s"', 'deletedir "D/s"'])
+        self.assertFalse(os.path.exists("D/s"))
+
+    def test_removes_create_and_delete_of_new_path(self):
+        os.mkdir("D")
+        self.write("cache/APY! Launcher/D/file", "new")
+        interpreter = APYUpdateLanguageInterpreter()
+        plan = interpreter.compile(['replacedir "D"', 'createdir "D/s"', 'deletedir "D/s"']).collapse()
+        self.assertEqual([command.name for command in plan.commands], ["replacedir"])
+
+
+class TestRun(LauncherFolderTestCase):
+    def test_rollback_on_decoding_error_while_writing(self):
+        # the csv files are only read when the modified files are written, after the last command
+        with open("apps.csv", "wb") as f:
+            f.write(b"g1,game,\xff\n")
+        interpreter = APYUpdateLanguageInterpreter()
+        with self.assertRaises(AULError):
+            interpreter.run(interpreter.compile(['createfile "new.txt"', 'updatecsv "apps.csv" all add 3']))
+        self.assertFalse(os.path.exists("new.txt"))
+        with open("apps.csv", "rb") as f:
+            self.assertEqual(f.read(), b"g1,game,\xff\n")
+
+
+class TestCompile(LauncherFolderTestCase):
+    def test_createfile_in_replaced_tree(self):
+        # D/s only exists in the new version of D
+        os.mkdir("D")
+        self.write("cache/APY! Launcher/D/s/x0", "new")
+        interpreter = APYUpdateLanguageInterpreter()
+        self.assertTrue(interpreter.execute_all(['replacedir "D"', 'createfile "D/s/x"']))
+        self.assertEqual(self.read("D/s/x0"), "new")
+        self.assertTrue(os.path.isfile("D/s/x"))
+
+    def test_replaced_tree_hides_removed_content(self):
+        # D/old is not in the new version of D
+        self.write("D/old/file", "previous")
+        self.write("cache/APY! Launcher/D/file", "new")
+        interpreter = APYUpdateLanguageInterpreter()
+        with self.assertRaises(AULError):
+            interpreter.compile(['replacedir "D"', 'update "D/old/file" newline end'])
+
+
+if __name__ == "__main__":
+    unittest.main()